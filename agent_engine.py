@@ -1,6 +1,12 @@
+import asyncio
+import json
 import requests
 import re
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
+
+from model_router import ModelRouter
+from conversation import Conversation
+from reply_cache import ReplyCache, reply_key
 
 
 class AIResponseError(Exception):
@@ -9,9 +15,9 @@ class AIResponseError(Exception):
 
 
 class AgentEngine:
-    def __init__(self, ollama_url="http://localhost:11434"):
-        self.ollama_url = ollama_url
-        self.model = "llama3.2:3b" #Change if different
+    def __init__(self, router: Optional[ModelRouter] = None, reply_cache: Optional[ReplyCache] = None):
+        self.router = router or ModelRouter()  # Models are picked per task in config.MODEL_ROUTES
+        self.reply_cache = reply_cache  # Serves neutral probes and first-turn replies for repeated messages
         
         self.victim_profile = {
             "name": "Hardik Lalla",
@@ -27,23 +33,93 @@ class AgentEngine:
         message: str,
         history: List[Dict],
         scam_type: str,
-        conversation_id: str
+        conversation_id: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        task: str = "engagement"
     ) -> Dict:
         """Generate AI response - raises AIResponseError if fails"""
-        response = await self._generate_ai_response(message, history, scam_type)
+        agent_turns = history.agent_turns if isinstance(history, Conversation) else len(
+            [m for m in history if m.get("role") == "agent"]
+        )
+        if self.reply_cache is not None and agent_turns == 0:
+            # With no earlier replies the prompt only depends on the message, so openers can be shared.
+            # Background refreshes run later, so they get a copy of the history as it is now.
+            opening = history.to_dicts() if isinstance(history, Conversation) else list(history)
+            response = await self.reply_cache.get(
+                reply_key("opener", message, scam_type or "unknown", task),
+                lambda on_token: self._generate_ai_response(message, opening, scam_type, on_token, task),
+                on_token
+            )
+        else:
+            response = await self._generate_ai_response(message, history, scam_type, on_token, task)
         
         return {
             "message": response,
             "conversation_id": conversation_id
         }
     
-    async def generate_neutral_probe(self, message: str) -> str:
+    async def generate_neutral_probe(
+        self,
+        message: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         """Generate simple response - raises AIResponseError if fails"""
-        return await self._generate_simple_response(message)
+        if self.reply_cache is None:
+            return await self._generate_simple_response(message, on_token)
+        return await self.reply_cache.get(
+            reply_key("neutral_probe", message),
+            lambda on_token: self._generate_simple_response(message, on_token),
+            on_token
+        )
+    
+    async def _complete(
+        self,
+        task: str,
+        payload: Dict,
+        timeout: int,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Run a generate request and return the raw text. With `on_token` the
+        reply is streamed and every fragment is passed to it on the event loop.
+        """
+        if on_token is None:
+            response = await self.router.generate(task, payload, timeout=timeout)
+            if response.status_code != 200:
+                raise AIResponseError(
+                    f"Ollama API error: Status {response.status_code}, "
+                    f"Response: {response.text[:200]}"
+                )
+            return response.json().get("response", "")
         
+        loop = asyncio.get_running_loop()
+        
+        def consume(response: requests.Response) -> str:
+            if response.status_code != 200:
+                raise AIResponseError(f"Ollama API error: Status {response.status_code}")
+            
+            pieces = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                piece = chunk.get("response", "")
+                if piece:
+                    pieces.append(piece)
+                    loop.call_soon_threadsafe(on_token, piece)
+                if chunk.get("done"):
+                    break
+            return "".join(pieces)
         
+        return await self.router.generate(
+            task, {**payload, "stream": True}, timeout=timeout, consume=consume
+        )
     
-    async def _generate_simple_response(self, message: str) -> str:
+    async def _generate_simple_response(
+        self,
+        message: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         
         prompt = f"""You are Hardik Lalla, a friendly 20-year-old engineering student in India.
 
@@ -60,26 +136,21 @@ Keep it short.
 Your response:"""
 
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
+            text = await self._complete(
+                "neutral_probe",
+                {
                     "prompt": prompt,
                     "stream": False,
-                    "temperature": 0.8,
                     "options": {
+                        "temperature": 0.8,
                         "num_predict": 80,
                         "stop": ["\n\n", "Message:", "You:"]
                     }
                 },
-                timeout=80
+                timeout=80,
+                on_token=on_token
             )
-            
-            if response.status_code != 200:
-                raise AIResponseError(f"Ollama API returned status {response.status_code}")
-            
-            result = response.json()
-            text = result.get("response", "").strip()
+            text = text.strip()
             
             if not text:
                 raise AIResponseError("Ollama returned empty response")
@@ -107,11 +178,16 @@ Your response:"""
         self,
         message: str,
         history: List[Dict],
-        scam_type: str
+        scam_type: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        task: str = "engagement"
     ) -> str:
         
         context = self._build_full_context(history)
-        turn_count = len([m for m in history if m.get("role") == "agent"])
+        if isinstance(history, Conversation):
+            turn_count = history.agent_turns
+        else:
+            turn_count = len([m for m in history if m.get("role") == "agent"])
         is_likely_scam = scam_type not in ["unknown", None, ""]
         
         if is_likely_scam:
@@ -120,30 +196,22 @@ Your response:"""
             prompt = self._create_normal_prompt(message, context, turn_count)
         
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
+            generated_text = await self._complete(
+                task,
+                {
                     "prompt": prompt,
                     "stream": False,
-                    "temperature": 0.85,
-                    "top_p": 0.92,
                     "options": {
+                        "temperature": 0.85,
+                        "top_p": 0.92,
                         "num_predict": 150,
                         "stop": ["\n\n", "Them:", "You:", "Assistant:", "Response:", "Message:"]
                     }
                 },
-                timeout=80
+                timeout=80,
+                on_token=on_token
             )
-            
-            if response.status_code != 200:
-                raise AIResponseError(
-                    f"Ollama API error: Status {response.status_code}, "
-                    f"Response: {response.text[:200]}"
-                )
-            
-            result = response.json()
-            generated_text = result.get("response", "").strip()
+            generated_text = generated_text.strip()
             
             if not generated_text:
                 raise AIResponseError("Ollama returned empty response")
@@ -171,7 +239,7 @@ Your response:"""
             )
         except requests.exceptions.ConnectionError:
             raise AIResponseError(
-                "Cannot connect to Ollama at {self.ollama_url}. "
+                "Cannot connect to any Ollama endpoint. "
                 "Check if Ollama is running: 'ollama serve'"
             )
         except requests.exceptions.RequestException as e:
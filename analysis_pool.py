@@ -0,0 +1,148 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from conversation import Conversation
+from intelligence_extractor import IntelligenceExtractor
+from scam_detector import analyze_patterns
+from config import ANALYSIS_WORKERS
+
+# Per-process state, built once by _init_worker (the extractor also compiles the pattern packs)
+_extractor: Optional[IntelligenceExtractor] = None
+
+
+def _init_worker():
+    global _extractor
+    _extractor = IntelligenceExtractor()
+
+
+def _extract_job(messages: List[Dict]) -> Dict:
+    return _extractor.extract_messages(messages)
+
+
+def _write_json_job(path: str, payload: bytes):
+    data = pickle.loads(payload)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class AnalysisPool:
+    """
+    Runs the CPU-bound parts of a turn, optionally in worker processes.
+
+    With workers=0 everything runs inline on the event loop, as before. With
+    workers > 0, extraction and pattern scoring go to a process pool whose
+    workers build their extractor once at startup, and DB snapshots are
+    written by a single writer process so the loop only pays for a pickle.
+    Extraction is incremental either way: jobs carry only the messages of the
+    current turn and the results are merged into Conversation.intelligence.
+    """
+
+    def __init__(self, extractor: Optional[IntelligenceExtractor] = None, workers: int = ANALYSIS_WORKERS):
+        self.extractor = extractor or IntelligenceExtractor()
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.writer: Optional[ProcessPoolExecutor] = None
+        if workers > 0:
+            # Spawn rather than fork: the server already has threads running
+            context = multiprocessing.get_context("spawn")
+            self.executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker)
+            self.writer = ProcessPoolExecutor(1, mp_context=context)
+
+        self._write_lock = threading.Lock()
+        self._write_in_flight = False
+        self._write_future: Optional[Future] = None
+        self._pending_writes: Dict[str, bytes] = {}
+        self.stats = {
+            "extract_jobs": 0,
+            "pattern_jobs": 0,
+            "messages_analyzed": 0,
+            "writes_submitted": 0,
+            "writes_coalesced": 0,
+            "write_errors": 0
+        }
+
+    async def _run(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def extract(self, conversation: Conversation, messages: List[Dict]) -> Dict:
+        """Extract from the new `messages` only and return the conversation's combined intelligence"""
+        payload = [{"role": m["role"], "content": m["content"]} for m in messages]
+        self.stats["extract_jobs"] += 1
+        self.stats["messages_analyzed"] += len(payload)
+
+        if self.executor is None:
+            partial = self.extractor.extract_messages(payload)
+        else:
+            partial = await self._run(_extract_job, payload)
+        return self.extractor.merge(conversation.intelligence, partial)
+
+    async def analyze_patterns(self, message: str) -> Tuple[float, str]:
+        self.stats["pattern_jobs"] += 1
+        return await self._run(analyze_patterns, message)
+
+    def save_json(self, path: str, data: Dict):
+        """
+        IntelligenceDB writer: hand a snapshot of `data` to the writer process.
+
+        Only one write runs at a time. Snapshots that arrive meanwhile replace
+        each other, so a burst of saves ends in a single write of the latest state.
+        """
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._write_lock:
+            if self._write_in_flight:
+                if path in self._pending_writes:
+                    self.stats["writes_coalesced"] += 1
+                self._pending_writes[path] = payload
+                return
+            self._write_in_flight = True
+        self._submit_write(path, payload)
+
+    def _submit_write(self, path: str, payload: bytes):
+        self.stats["writes_submitted"] += 1
+        future = self.writer.submit(_write_json_job, path, payload)
+        self._write_future = future
+        future.add_done_callback(self._write_done)
+
+    def _write_done(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            self.stats["write_errors"] += 1
+            print(f"Error writing database: {future.exception() if not future.cancelled() else 'cancelled'}")
+
+        with self._write_lock:
+            if not self._pending_writes:
+                self._write_in_flight = False
+                return
+            path = next(iter(self._pending_writes))
+            payload = self._pending_writes.pop(path)
+        self._submit_write(path, payload)
+
+    async def close(self):
+        """Wait for the last snapshot to be written, then stop the workers"""
+        if self.writer is not None:
+            while True:
+                with self._write_lock:
+                    future = self._write_future if self._write_in_flight else None
+                if future is None:
+                    break
+                # _write_done runs before this wakes up, so a queued snapshot is already submitted
+                await asyncio.wrap_future(future)
+            await asyncio.to_thread(self.writer.shutdown)
+        if self.executor is not None:
+            await asyncio.to_thread(self.executor.shutdown)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "mode": "process" if self.executor is not None else "inline",
+            "workers": self.workers,
+            "write_in_flight": self._write_in_flight
+        }
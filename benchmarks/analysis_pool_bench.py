@@ -0,0 +1,107 @@
+"""
+Throughput of the CPU-bound part of a turn (pattern scoring and extraction)
+inline vs with AnalysisPool worker processes.
+
+    python benchmarks/analysis_pool_bench.py [conversations] [turns] [max_workers]
+
+Each round analyzes one turn of every conversation concurrently, the way bulk
+/detect traffic does, then saves them. "full-history" is the old path: every
+turn rescans the whole conversation. Saves stay in memory in every mode, so
+the pool's merged writes can't inflate its numbers; "analysis/s" counts the
+analysis phase alone and "turns/s" the whole round including the saves.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_pool import AnalysisPool
+from conversation import Conversation
+from intelligence_db import IntelligenceDB
+from intelligence_extractor import IntelligenceExtractor
+from scam_detector import analyze_patterns
+
+SCAMMER_LINES = [
+    "dear customer your SBI account will be blocked today, update KYC at http://sbi-kyc-update.tk/login",
+    "send rs 10 to verify.refund{n}@ybl to receive your cashback of rs 4999 immediately",
+    "call our customer service on +91 98{n:08d} or share account number {n}12345678 and IFSC SBIN0{n:06d}",
+    "this is income tax department, your PAN ABCDE{n:04d}F is under investigation, pay fine via upi",
+]
+AGENT_LINES = [
+    "ohh wait which bank is this",
+    "umm okay how do i do that",
+    "bro its not working, can u send ur upi",
+]
+
+
+def make_message(rng: random.Random) -> str:
+    # Scammers paste long messages; repeat a few lines to get realistic sizes
+    return " ".join(rng.choice(SCAMMER_LINES).format(n=rng.randint(1000, 9999)) for _ in range(4))
+
+
+async def analyze_turn(mode, pool, extractor, conversation, message):
+    if mode == "full-history":
+        analyze_patterns(message)
+        conversation.append("scammer", message)
+        conversation.append("agent", AGENT_LINES[0])
+        return extractor.extract(conversation, message)
+    await pool.analyze_patterns(message)
+    conversation.append("scammer", message)
+    conversation.append("agent", AGENT_LINES[0])
+    return await pool.extract(conversation, conversation.to_dicts(len(conversation) - 2))
+
+
+async def bench(mode: str, workers: int, conversations: int, turns: int) -> Tuple[float, float]:
+    rng = random.Random(7)
+    pool = AnalysisPool(workers=workers)
+    extractor = IntelligenceExtractor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "intelligence_db.json")
+        db = IntelligenceDB(db_file)
+        db.writer = lambda path, data: None  # Same write policy in every mode: none
+        store = {f"conv-{c}": Conversation() for c in range(conversations)}
+
+        # Let the workers start before timing
+        await asyncio.gather(*(pool.analyze_patterns("warm up") for _ in range(max(workers, 1) * 2)))
+
+        analysis = 0.0
+        start = time.perf_counter()
+        for _ in range(turns):
+            round_start = time.perf_counter()
+            results = await asyncio.gather(*(
+                analyze_turn(mode, pool, extractor, conversation, make_message(rng))
+                for conversation in store.values()
+            ))
+            analysis += time.perf_counter() - round_start
+            for (cid, conversation), intel in zip(store.items(), results):
+                db.save_conversation(cid, True, 0.9, intel, conversation, {"total_turns": len(conversation)})
+        elapsed = time.perf_counter() - start
+        await pool.close()
+    return conversations * turns / analysis, conversations * turns / elapsed
+
+
+def main():
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+
+    print(f"{conversations} conversations x {turns} turns, {os.cpu_count()} cores")
+    print(f"{'mode':<14}{'workers':>8}{'analysis/s':>12}{'turns/s':>12}")
+    runs = [("full-history", 0), ("inline", 0)]
+    workers = 1
+    while workers <= max_workers:
+        runs.append(("process", workers))
+        workers *= 2
+
+    for mode, workers in runs:
+        analysis_rate, rate = asyncio.run(bench(mode, workers, conversations, turns))
+        print(f"{mode:<14}{workers:>8}{analysis_rate:>12.1f}{rate:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Memory benchmark: 100k live conversations as dict turn lists vs Conversation.
+
+    python benchmarks/conversation_memory_bench.py [conversations] [turns]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation import Conversation
+
+SCAMMER_LINES = [
+    "hello who is this",
+    "your KYC is pending, update now or account will be blocked",
+    "send 10 rs to verify on paytm",
+    "sir pls share otp",
+    "click here http://bit.ly/kyc-upd",
+]
+AGENT_LINES = [
+    "ohh wait which bank is this",
+    "umm okay how do i do that",
+    "bro its not working, can u send ur upi",
+    "ok sending, whats ur account number again",
+]
+
+
+def make_turns(turns: int, rng: random.Random):
+    now = time.time()
+    for i in range(turns):
+        if i % 2 == 0:
+            # Some scammer text is unique per conversation (names, amounts)
+            yield "scammer", f"{rng.choice(SCAMMER_LINES)} ref {rng.randint(1000, 9999)}", now + i
+        else:
+            yield "agent", rng.choice(AGENT_LINES), now + i
+
+
+def build_dicts(conversations: int, turns: int):
+    rng = random.Random(1)
+    store = {}
+    for c in range(conversations):
+        store[f"conv-{c}"] = [
+            {"role": role, "content": content, "timestamp": datetime.fromtimestamp(ts).isoformat()}
+            for role, content, ts in make_turns(turns, rng)
+        ]
+    return store
+
+
+def build_compact(conversations: int, turns: int):
+    rng = random.Random(1)
+    store = {}
+    for c in range(conversations):
+        conversation = Conversation()
+        for role, content, ts in make_turns(turns, rng):
+            conversation.append(role, content, ts)
+        store[f"conv-{c}"] = conversation
+    return store
+
+
+def measure(builder, conversations: int, turns: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = builder(conversations, turns)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current, elapsed
+
+
+def metrics_cost(store, compact: bool, rounds: int = 3) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for history in store.values():
+            if compact:
+                history.agent_turns, history.duration_seconds
+            else:
+                len([m for m in history if m.get("role") == "agent"])
+                (datetime.fromisoformat(history[-1]["timestamp"]) -
+                 datetime.fromisoformat(history[0]["timestamp"])).total_seconds()
+    return (time.perf_counter() - start) / rounds
+
+
+if __name__ == "__main__":
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for name, builder, compact in [("dict turns", build_dicts, False), ("Conversation", build_compact, True)]:
+        store, memory, elapsed = measure(builder, conversations, turns)
+        print(
+            f"{name:>13}: {memory / 2**20:8.1f} MiB "
+            f"({memory / conversations:7.0f} B/conversation), "
+            f"build {elapsed:5.2f}s, metrics pass {metrics_cost(store, compact) * 1000:7.1f} ms"
+        )
+        del store
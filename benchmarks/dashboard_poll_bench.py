@@ -0,0 +1,140 @@
+"""
+Repeated dashboard polling of the /intelligence read endpoints, before and
+after the response cache.
+
+    python benchmarks/dashboard_poll_bench.py [conversations] [polls] [saves_every]
+
+Fills a scratch intelligence DB, then polls /all, /stats, /high-value and
+/conversations the way a dashboard does, with a new conversation saved every
+`saves_every` polls. "before" serves the getters' dicts through FastAPI's
+default JSON encoding, as the endpoints used to. The cached variants go
+through ResponseCache plain, compressed, and with If-None-Match revalidation.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from intelligence_db import IntelligenceDB
+from response_cache import ResponseCache
+
+ENDPOINTS = ["/all", "/stats", "/high-value", "/conversations"]
+
+
+def fake_conversation(db: IntelligenceDB, index: int, rng: random.Random):
+    intelligence = {
+        "bank_accounts": [str(rng.randint(10**11, 10**12)) for _ in range(rng.randint(0, 2))],
+        "upi_ids": [f"user{rng.randint(0, 50000)}@ybl" for _ in range(rng.randint(0, 3))],
+        "phone_numbers": [f"+91{rng.randint(6000000000, 9999999999)}" for _ in range(rng.randint(0, 2))],
+        "urls": [f"http://kyc-{rng.randint(0, 9999)}.tk/login" for _ in range(rng.randint(0, 2))],
+        "suspicious_keywords": ["urgent", "blocked", "kyc"]
+    }
+    db.save_conversation(
+        f"conv-{index}",
+        scam_detected=True,
+        confidence=0.9,
+        intelligence=intelligence,
+        messages=[{}] * 8,
+        metrics={"total_turns": 4, "conversation_duration": 120.0},
+        scam_type="kyc_fraud"
+    )
+
+
+def build_apps(db: IntelligenceDB):
+    before = FastAPI()
+
+    @before.get("/all")
+    async def all_intelligence_before():
+        return db.get_all_intelligence()
+
+    @before.get("/stats")
+    async def statistics_before():
+        return db.get_statistics()
+
+    @before.get("/high-value")
+    async def high_value_before(limit: int = 20):
+        return db.get_high_value_intelligence(limit=limit)
+
+    @before.get("/conversations")
+    async def conversations_before(limit: int = 50):
+        return db.get_conversations(limit=limit)
+
+    cache = ResponseCache()
+    after = FastAPI()
+
+    @after.get("/all")
+    async def all_intelligence(request: Request):
+        return cache.respond(request, "all", db.version, db.get_all_intelligence)
+
+    @after.get("/stats")
+    async def statistics(request: Request):
+        return cache.respond(request, "stats", db.version, db.get_statistics)
+
+    @after.get("/high-value")
+    async def high_value(request: Request, limit: int = 20):
+        return cache.respond(request, ("high-value", limit), db.version,
+                             lambda: db.get_high_value_intelligence(limit=limit))
+
+    @after.get("/conversations")
+    async def conversations(request: Request, limit: int = 50):
+        return cache.respond(request, ("conversations", limit), db.version,
+                             lambda: db.get_conversations(limit=limit))
+
+    return before, after, cache
+
+
+def poll(app: FastAPI, db: IntelligenceDB, polls: int, saves_every: int, encoding: str, revalidate: bool):
+    rng = random.Random(1)
+    etags = {}
+    sent = 0
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        for i in range(polls):
+            if i and i % saves_every == 0:
+                fake_conversation(db, 10**6 + i, rng)
+            for path in ENDPOINTS:
+                headers = {"Accept-Encoding": encoding}
+                if revalidate and path in etags:
+                    headers["If-None-Match"] = etags[path]
+                response = client.get(path, params={"limit": 50}, headers=headers)
+                etags[path] = response.headers.get("etag", "")
+                sent += int(response.headers.get("content-length", 0))
+        elapsed = time.perf_counter() - start
+    return elapsed / polls * 1000, sent / polls
+
+
+def main():
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    saves_every = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Keep the DB in memory only; writing it out on every save isn't what's measured
+        db = IntelligenceDB(os.path.join(scratch, "intelligence_db.json"), writer=lambda path, data: None)
+        rng = random.Random(0)
+        for index in range(conversations):
+            fake_conversation(db, index, rng)
+
+        before, after, cache = build_apps(db)
+        print(f"{conversations} conversations, {polls} polls of {len(ENDPOINTS)} endpoints, "
+              f"a save every {saves_every} polls")
+        print(f"{'variant':<28}{'ms/poll':>10}{'KB/poll':>10}")
+        for name, app, encoding, revalidate in [
+            ("before", before, "identity", False),
+            ("cached", after, "identity", False),
+            ("cached + gzip/br", after, "br, gzip", False),
+            ("cached + gzip/br + ETag", after, "br, gzip", True),
+        ]:
+            ms, size = poll(app, db, polls, saves_every, encoding, revalidate)
+            print(f"{name:<28}{ms:>10.2f}{size / 1024:>10.1f}")
+        print(cache.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Startup benchmark: import time of main.py and latency of the first /detect call.
+
+Run from the project root with Ollama running:
+    python benchmarks/startup_bench.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure_import_time(runs: int = 5) -> float:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c",
+             "import time; s = time.perf_counter(); import main; print(time.perf_counter() - s)"],
+            cwd=ROOT
+        )
+        samples.append(float(output.decode().strip().splitlines()[-1]))
+    return min(samples)
+
+
+def measure_first_request(wait_for_ready: bool) -> float:
+    from fastapi.testclient import TestClient
+    from config import API_KEY
+    import main
+
+    with TestClient(main.app) as client:
+        if wait_for_ready:
+            while client.get("/readyz").status_code != 200:
+                if main.warmup_state["status"] == "failed":
+                    raise RuntimeError(f"Warm-up failed: {main.warmup_state['error']}")
+                time.sleep(0.2)
+            print(f"  warm-up took {main.warmup_state['duration_seconds']}s")
+
+        start = time.perf_counter()
+        client.post(
+            "/detect",
+            headers={"X-API-Key": API_KEY},
+            json={"conversation_id": "bench-startup", "message": "hello who is this"}
+        )
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())
+    print(f"import main: {measure_import_time() * 1000:.1f} ms")
+    mode = sys.argv[1] if len(sys.argv) > 1 else "ready"
+    elapsed = measure_first_request(wait_for_ready=(mode == "ready"))
+    print(f"first /detect ({mode}): {elapsed:.2f} s")
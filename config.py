@@ -5,8 +5,63 @@ API_HOST = "0.0.0.0"
 API_PORT = 8000
 OLLAMA_URL = "http://localhost:11434"
 OLLAMA_MODEL = "llama3.2:3b"  #Use whatever you want, and whatever your hardware can support
+OLLAMA_SMALL_MODEL = "llama3.2:1b"  # Fast model for classification, neutral probes and overload fallback
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model loaded after a request
 
-MAX_CONVERSATION_TURNS = 20
+# Every Ollama instance to balance across, e.g. several local instances on different ports
+OLLAMA_ENDPOINTS = [OLLAMA_URL]
+
+# Which model handles which task
+MODEL_ROUTES = {
+    "classification": OLLAMA_SMALL_MODEL,
+    "neutral_probe": OLLAMA_SMALL_MODEL,
+    "engagement": OLLAMA_MODEL,
+    "engagement_light": OLLAMA_SMALL_MODEL  # Replies for conversations that stopped yielding intelligence
+}
+ROUTER_FALLBACK_QUEUE_DEPTH = 4  # In-flight requests per healthy endpoint before falling back to the small model
+ROUTER_HEALTH_CHECK_INTERVAL_SECONDS = 30
+
+WARMUP_TIMEOUT_SECONDS = 120
+WARMUP_RETRIES = 3
+WARMUP_RETRY_DELAY_SECONDS = 5
+WARMUP_MAX_RETRY_DELAY_SECONDS = 60  # Warm-up keeps retrying after failing, backing off up to this delay
+
+ENRICHMENT_WORKERS = 2
+ENRICHMENT_QUEUE_SIZE = 1000  # Pending jobs before new ones are dropped
+ENRICHMENT_CACHE_SIZE = 10000
+ENRICHMENT_FLUSH_INTERVAL_SECONDS = 5  # Enrichment results are merged into the DB in batches this often
+
+LIVE_UPDATE_QUEUE_SIZE = 256  # Pending WebSocket events per client before it is disconnected
+
+TRANSCRIPT_DIR = "transcripts"
+TRANSCRIPT_SHARDS = 16
+TRANSCRIPT_SEGMENT_BYTES = 64 * 1024 * 1024
+TRANSCRIPT_FSYNC_BATCH = 256  # Records per shard before an immediate fsync
+TRANSCRIPT_FSYNC_INTERVAL_SECONDS = 1.0
+TRANSCRIPT_RETENTION_DAYS = 90  # None keeps transcripts forever
+TRANSCRIPT_COMPACTION_INTERVAL_SECONDS = 3600
+TRANSCRIPT_COMPACTION_GARBAGE_RATIO = 0.3  # Share of deleted bytes that triggers a shard rewrite
+
+ANALYSIS_WORKERS = 0  # Processes for extraction, pattern scoring and DB serialization; 0 runs them inline
+
+PATTERN_PACKS = ["en", "hi", "hinglish"]  # Language packs loaded from data/patterns/
+
+RESPONSE_CACHE_ENTRIES = 64  # Serialized /intelligence responses kept, one per endpoint and query
+RESPONSE_COMPRESS_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+
+ROLLUP_FILE = "intelligence_rollups.json"
+ROLLUP_FLUSH_INTERVAL_SECONDS = 30
+ROLLUP_RETENTION = {"minute": 1440, "hour": 720, "day": 730}  # Buckets kept per granularity
+
+REPLY_CACHE_ENTRIES = 5000  # Normalized messages with cached replies, least recently used dropped first
+REPLY_CACHE_VARIANTS = 4  # Different LLM replies kept per message
+REPLY_CACHE_MIN_VARIANTS = 2  # Replies generated inline before a message is served from the cache
+REPLY_CACHE_REFRESH_SECONDS = 3600  # Age after which the oldest reply is replaced in the background
+REPLY_CACHE_MAX_MESSAGE_CHARS = 160  # Longer messages are never cached
+
+MAX_CONVERSATION_TURNS = 20  # Agent replies before a conversation with no fresh intelligence is closed
+ENGAGEMENT_LIGHT_AFTER_TURNS = 3  # Replies without new intelligence before switching to the small model
+ENGAGEMENT_TEMPLATE_AFTER_TURNS = 6  # Replies without new intelligence before switching to canned replies
 SCAM_CONFIDENCE_THRESHOLD = 0.65
 
 ENABLE_FALLBACK_RESPONSES = True
@@ -16,5 +71,13 @@ MAX_RESPONSE_LENGTH = 200
 USE_REDIS = False
 REDIS_URL = "redis://localhost:6379"
 
+# Token buckets as (burst, refill per second); a request spends one token from each
+RATE_LIMITS = {
+    "api_key": (60, 10.0),
+    "ip": (30, 2.0),
+    "conversation": (5, 0.5)
+}
+RATE_LIMIT_MAX_KEYS = 100000  # Buckets kept in memory before the least recently used are dropped
+
 LOG_LEVEL = "INFO"
 LOG_FILE = "honeypot.log"
@@ -0,0 +1,110 @@
+import sys
+import time
+from array import array
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class Role(IntEnum):
+    SCAMMER = 0
+    AGENT = 1
+
+
+ROLE_NAMES = {Role.SCAMMER: "scammer", Role.AGENT: "agent"}
+ROLES_BY_NAME = {name: role for role, name in ROLE_NAMES.items()}
+
+
+def to_epoch(timestamp: Union[float, str, None]) -> float:
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp()
+    return float(timestamp)
+
+
+class Conversation:
+    """
+    Compact turn log for one live conversation.
+
+    Roles and timestamps live in typed arrays and message text is interned,
+    so a turn costs a few bytes plus its text instead of a dict with three
+    string values. Counters are kept up to date on append, so metrics never
+    rescan the history. Indexing or iterating yields the old
+    {"role", "content", "timestamp"} dicts for code that still expects them.
+    """
+
+    __slots__ = (
+        "roles", "timestamps", "contents",
+        "agent_turns", "byte_size", "seq", "digest", "intelligence"
+    )
+
+    def __init__(self):
+        self.roles = array("b")
+        self.timestamps = array("d")
+        self.contents: List[str] = []
+        self.agent_turns = 0
+        self.byte_size = 0
+        self.seq = 0  # Incoming messages accepted so far, see main.accept_message
+        self.digest = ""
+        self.intelligence: Dict[str, set] = {}  # Running extraction, see AnalysisPool.extract
+
+    def append(self, role: Union[Role, str], content: str, timestamp: Union[float, str, None] = None):
+        if isinstance(role, str):
+            role = ROLES_BY_NAME[role]
+
+        self.roles.append(role)
+        self.timestamps.append(to_epoch(timestamp))
+        self.contents.append(sys.intern(content))
+
+        if role == Role.AGENT:
+            self.agent_turns += 1
+        self.byte_size += len(content.encode("utf-8"))
+
+    def extend(self, messages: List[Dict]):
+        for message in messages:
+            self.append(message["role"], message["content"], message.get("timestamp"))
+
+    @property
+    def total_turns(self) -> int:
+        return len(self.roles)
+
+    @property
+    def first_timestamp(self) -> Optional[float]:
+        return self.timestamps[0] if self.timestamps else None
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return self.timestamps[-1] if self.timestamps else None
+
+    @property
+    def duration_seconds(self) -> int:
+        if len(self.timestamps) < 2:
+            return 0
+        return int(self.timestamps[-1] - self.timestamps[0])
+
+    def message(self, index: int) -> Dict:
+        return {
+            "role": ROLE_NAMES[Role(self.roles[index])],
+            "content": self.contents[index],
+            "timestamp": datetime.fromtimestamp(self.timestamps[index]).isoformat()
+        }
+
+    def to_dicts(self, start: int = 0) -> List[Dict]:
+        return [self.message(i) for i in range(start, len(self.roles))]
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.message(i) for i in range(*index.indices(len(self.roles)))]
+        if index < 0:
+            index += len(self.roles)
+        if not 0 <= index < len(self.roles):
+            raise IndexError("conversation index out of range")
+        return self.message(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self.roles)):
+            yield self.message(i)
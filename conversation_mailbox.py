@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class ConversationMailbox:
+    """Pending messages and the drain task for one conversation"""
+
+    def __init__(self):
+        self.pending: List[Dict] = []
+        self.drainer: Optional[asyncio.Task] = None
+
+
+class MailboxRouter:
+    """
+    Serializes turns per conversation.
+
+    Each conversation gets one drain task that processes its turns in arrival
+    order. Messages that arrive while a reply is still being generated wait in
+    the mailbox and are handled together as the next turn, and every coalesced
+    caller gets that turn's result. Conversations never share a drain task, so
+    they run in parallel.
+    """
+
+    def __init__(self, handler: Callable[[str, List[Dict]], Awaitable[Dict]]):
+        self.handler = handler
+        self._mailboxes: Dict[str, ConversationMailbox] = {}
+        self.stats = {
+            "messages_received": 0,
+            "turns_processed": 0,
+            "messages_coalesced": 0
+        }
+
+    async def submit(self, conversation_id: str, message: str) -> Dict:
+        mailbox = self._mailboxes.setdefault(conversation_id, ConversationMailbox())
+        future = asyncio.get_running_loop().create_future()
+        mailbox.pending.append({
+            "role": "scammer",
+            "content": message,
+            "timestamp": time.time(),
+            "future": future
+        })
+        self.stats["messages_received"] += 1
+
+        if mailbox.drainer is None:
+            mailbox.drainer = asyncio.create_task(self._drain(conversation_id, mailbox))
+
+        # Shielded so a disconnecting client doesn't cancel a turn other callers share
+        return await asyncio.shield(future)
+
+    async def _drain(self, conversation_id: str, mailbox: ConversationMailbox):
+        try:
+            while mailbox.pending:
+                batch = mailbox.pending
+                mailbox.pending = []
+                await self._process(conversation_id, batch)
+        finally:
+            mailbox.drainer = None
+            if self._mailboxes.get(conversation_id) is mailbox:
+                del self._mailboxes[conversation_id]
+
+    async def _process(self, conversation_id: str, batch: List[Dict]):
+        messages = [
+            {key: value for key, value in item.items() if key != "future"}
+            for item in batch
+        ]
+
+        try:
+            result = await self.handler(conversation_id, messages)
+        except Exception as e:
+            for item in batch:
+                if not item["future"].done():
+                    item["future"].set_exception(e)
+            return
+
+        self.stats["turns_processed"] += 1
+        self.stats["messages_coalesced"] += len(batch) - 1
+        for item in batch:
+            if not item["future"].done():
+                item["future"].set_result(result)
@@ -0,0 +1,129 @@
+from typing import Dict
+
+from intelligence_extractor import IntelligenceValidator
+from config import (
+    MAX_CONVERSATION_TURNS,
+    ENGAGEMENT_LIGHT_AFTER_TURNS,
+    ENGAGEMENT_TEMPLATE_AFTER_TURNS
+)
+
+FULL = "full"
+LIGHT = "light"
+TEMPLATE = "template"
+CAPPED = "capped"
+
+INDICATOR_KEYS = [
+    "bank_accounts", "upi_ids", "phone_numbers", "urls",
+    "ifsc_codes", "emails", "pan_cards", "aadhaar_numbers"
+]
+
+# Cheap replies that stay in character and still fish for details
+STALL_REPLIES = [
+    "wait the app is showing some error, can u send ur upi id i'll try directly",
+    "umm ok im trying but its not going through, is there any other number i can call",
+    "bro my network is so slow rn, can u send the link again pls",
+    "ok wait which account should i send it to? send full details pls",
+    "sorry was in class, what do i have to do again",
+    "my papa is asking which bank this is from, whats ur branch and ifsc",
+]
+# For chats that never looked like a scam: stall without fishing for payment details
+NEUTRAL_STALL_REPLIES = [
+    "haha ok, sorry bit busy rn, what's up?",
+    "sorry who is this again? i think i don't have ur number saved",
+    "hmm ok, can we talk later? in class rn",
+    "oh ok, tell me more",
+]
+CLOSING_REPLIES = [
+    "ok let me ask my papa and get back to u",
+    "bro my phone is about to die, will msg later",
+    "ok i'll do it tomorrow morning, bank is closed now anyway",
+]
+
+
+class EngagementScheduler:
+    """
+    Decides how much inference each conversation's next reply gets.
+
+    Yield is tracked per conversation as IntelligenceValidator's quality score
+    and the number of indicators found, against the seconds spent generating
+    replies. A conversation that keeps producing intelligence gets the full
+    persona model; one that has gone ENGAGEMENT_LIGHT_AFTER_TURNS replies
+    without anything new drops to the small model, then to canned replies
+    after ENGAGEMENT_TEMPLATE_AFTER_TURNS, and gets a closing reply once it
+    passes MAX_CONVERSATION_TURNS. While the model router is saturated, only
+    conversations that produced something in their last reply get the LLM.
+    """
+
+    def __init__(self, router=None):
+        self.router = router
+        self._sessions: Dict[str, Dict] = {}
+        self.stats = {
+            "turns_by_tier": {FULL: 0, LIGHT: 0, TEMPLATE: 0, CAPPED: 0},
+            "llm_seconds": 0.0,
+            "quality_gained": 0,
+            "indicators_gained": 0
+        }
+
+    def _session(self, conversation_id: str) -> Dict:
+        return self._sessions.setdefault(conversation_id, {
+            "turns": 0,
+            "quality_score": 0,
+            "indicators": 0,
+            "last_gain_turn": 0,
+            "llm_seconds": 0.0
+        })
+
+    def plan(self, conversation_id: str) -> str:
+        """Tier for the next reply: full, light, template or capped"""
+        session = self._session(conversation_id)
+        stale_turns = session["turns"] - session["last_gain_turn"]
+
+        if session["turns"] >= MAX_CONVERSATION_TURNS and stale_turns > 0:
+            tier = CAPPED
+        elif stale_turns >= ENGAGEMENT_TEMPLATE_AFTER_TURNS:
+            tier = TEMPLATE
+        elif self.router is not None and self.router.saturated() and stale_turns > 0:
+            tier = TEMPLATE
+        elif stale_turns >= ENGAGEMENT_LIGHT_AFTER_TURNS:
+            tier = LIGHT
+        else:
+            tier = FULL
+
+        self.stats["turns_by_tier"][tier] += 1
+        return tier
+
+    def template_reply(self, conversation_id: str, tier: str, scam: bool = True) -> str:
+        session = self._session(conversation_id)
+        if tier == CAPPED:
+            replies = CLOSING_REPLIES
+        else:
+            replies = STALL_REPLIES if scam else NEUTRAL_STALL_REPLIES
+        return replies[session["turns"] % len(replies)]
+
+    def record(self, conversation_id: str, llm_seconds: float, intelligence: Dict):
+        """Account one reply and the intelligence the conversation has produced so far"""
+        session = self._session(conversation_id)
+        session["turns"] += 1
+        session["llm_seconds"] += llm_seconds
+        self.stats["llm_seconds"] += llm_seconds
+
+        quality_score = IntelligenceValidator.validate_extraction(intelligence)["quality_score"]
+        indicators = sum(len(intelligence.get(key, [])) for key in INDICATOR_KEYS)
+        if quality_score > session["quality_score"] or indicators > session["indicators"]:
+            self.stats["quality_gained"] += max(quality_score - session["quality_score"], 0)
+            self.stats["indicators_gained"] += max(indicators - session["indicators"], 0)
+            session["last_gain_turn"] = session["turns"]
+        session["quality_score"] = max(quality_score, session["quality_score"])
+        session["indicators"] = max(indicators, session["indicators"])
+
+    def forget(self, conversation_id: str):
+        self._sessions.pop(conversation_id, None)
+
+    def get_stats(self) -> Dict:
+        seconds = self.stats["llm_seconds"]
+        return {
+            **self.stats,
+            "llm_seconds": round(seconds, 3),
+            "sessions": len(self._sessions),
+            "indicators_per_llm_second": round(self.stats["indicators_gained"] / seconds, 4) if seconds else 0.0
+        }
@@ -6,6 +6,8 @@ const API_CONFIG = {
 let sessionState = {
     conversationId: generateSessionId(),
     history: [],
+    seq: 0,
+    historyDigest: '',
     metrics: {
         turns: 0,
         confidence: 0,
@@ -74,24 +76,23 @@ async function sendMessage() {
     DOM.messageInput.value = '';
 
     try {
-        const response = await fetch(API_CONFIG.url, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-API-Key': API_CONFIG.key
-            },
-            body: JSON.stringify({
-                conversation_id: sessionState.conversationId,
-                message: message,
-                history: sessionState.history
-            })
-        });
+        let response = await postToHoneypot(message);
+
+        if (response.status === 409) {
+            // Server history diverged (e.g. it restarted) - adopt its position and resend once
+            const conflict = await response.json();
+            sessionState.seq = conflict.detail.expected_seq;
+            sessionState.historyDigest = conflict.detail.history_digest;
+            response = await postToHoneypot(message);
+        }
 
         if (!response.ok) {
             throw new Error(`API Error: ${response.status}`);
         }
 
         const data = await response.json();
+        sessionState.seq = data.next_seq;
+        sessionState.historyDigest = data.history_digest;
         
         sessionState.history.push({
             role: 'scammer',
@@ -118,6 +119,22 @@ async function sendMessage() {
     }
 }
 
+function postToHoneypot(message) {
+    return fetch(API_CONFIG.url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-API-Key': API_CONFIG.key
+        },
+        body: JSON.stringify({
+            conversation_id: sessionState.conversationId,
+            message: message,
+            seq: sessionState.seq,
+            history_digest: sessionState.historyDigest
+        })
+    });
+}
+
 function addMessageToUI(source, content) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message ${source}`;
@@ -261,6 +278,8 @@ function clearConversation() {
     
     sessionState.conversationId = generateSessionId();
     sessionState.history = [];
+    sessionState.seq = 0;
+    sessionState.historyDigest = '';
     sessionState.metrics = {
         turns: 0,
         confidence: 0,
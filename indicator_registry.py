@@ -0,0 +1,78 @@
+from typing import Dict, Iterable, List, Tuple
+
+INDICATOR_TYPES = [
+    "bank_accounts", "upi_ids", "phone_numbers", "urls",
+    "ifsc_codes", "emails", "pan_cards", "aadhaar_numbers"
+]
+
+
+class IndicatorRegistry:
+    """
+    Deduplicated indicator index with per-indicator counters.
+
+    Wraps the "indicators" section of the DB, a dict of
+    {type: {value: {"count", "first_seen", "last_seen"}}}. The per-type
+    dicts double as the persistent hash set for "seen before?" checks, so a
+    merge costs O(items in the update) no matter how many indicators are
+    known. `count` is the number of conversations an indicator appeared in;
+    re-submitting a conversation does not count it twice.
+    """
+
+    def __init__(self, indicators: Dict[str, Dict[str, Dict]]):
+        self.indicators = indicators
+        for kind in INDICATOR_TYPES:
+            self.indicators.setdefault(kind, {})
+
+    def observe(
+        self,
+        kind: str,
+        values: Iterable[str],
+        previous: Iterable[str],
+        timestamp: str
+    ) -> Tuple[List[str], int]:
+        """
+        Record the `values` one conversation produced for `kind`.
+
+        `previous` are the values already counted for that conversation.
+        Returns the values never seen before and how many of the values new
+        to this conversation were already known from another one.
+        """
+        known = self.indicators.setdefault(kind, {})
+        previous = set(previous)
+
+        new_values = []
+        repeats = 0
+        for value in dict.fromkeys(values):
+            entry = known.get(value)
+            if entry is None:
+                known[value] = {"count": 1, "first_seen": timestamp, "last_seen": timestamp}
+                new_values.append(value)
+                continue
+
+            entry["last_seen"] = timestamp
+            if value not in previous:
+                entry["count"] += 1
+                repeats += 1
+        return new_values, repeats
+
+    def ranked(self, kind: str, limit: int = None) -> List[Dict]:
+        """Indicators of `kind`, most frequent first, most recent breaking ties"""
+        entries = sorted(
+            self.indicators.get(kind, {}).items(),
+            key=lambda item: (item[1]["count"], item[1]["last_seen"]),
+            reverse=True
+        )
+        if limit is not None:
+            entries = entries[:limit]
+        return [{"value": value, **entry} for value, entry in entries]
+
+    @classmethod
+    def rebuild(cls, conversations: Dict[str, Dict]) -> "IndicatorRegistry":
+        """Build the registry from saved conversations, for DBs written before it existed"""
+        registry = cls({})
+        for record in sorted(conversations.values(), key=lambda r: r.get("timestamp", "")):
+            timestamp = record.get("timestamp", "")
+            for kind, values in record.get("intelligence_extracted", {}).items():
+                if kind in registry.indicators and values:
+                    registry.observe(kind, values, [], timestamp)
+        return registry
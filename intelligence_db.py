@@ -1,16 +1,55 @@
 
+import asyncio
 import json
 import os
+import pickle
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 from pathlib import Path
 
+from indicator_registry import IndicatorRegistry, INDICATOR_TYPES
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, lock_db always succeeds
+    fcntl = None
+
+
+def lock_db(db_file: str):
+    """
+    Take the exclusive lock that marks a process as the DB's writer; returns
+    the open lock file (keep it open to hold the lock) or None if another
+    process holds it. The OS drops the lock when the holder exits, even on a crash.
+    """
+    handle = open(db_file + ".lock", "a+")
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
 
 class IntelligenceDB:
-    def __init__(self, db_file="intelligence_db.json"):
+    def __init__(self, db_file="intelligence_db.json", writer: Optional[Callable[[str, Dict], None]] = None):
         self.db_file = db_file
         self.db_path = Path(db_file)
+        self._db = None
+        self.writer = writer  # Replaces the inline json.dump, e.g. AnalysisPool.save_json
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.version = 0  # Bumped on every write, so cached responses know when they are stale
+        self._file_lock = threading.Lock()
+        self._written_version = -1
         self._ensure_db_exists()
+        if self._db is None:
+            self._db = self._load_db()
+        self.registry = self._load_registry()
     
     def _ensure_db_exists(self):
         if not self.db_path.exists():
@@ -26,6 +65,8 @@ class IntelligenceDB:
                     "pan_cards": [],
                     "aadhaar_numbers": []
                 },
+                "indicators": {},
+                "enrichment": {},
                 "statistics": {
                     "total_conversations": 0,
                     "total_scams_detected": 0,
@@ -36,6 +77,11 @@ class IntelligenceDB:
             self._write_db(initial_data)
     
     def _read_db(self) -> Dict:
+        if self._db is not None:
+            return self._db
+        return self._load_db()
+    
+    def _load_db(self) -> Dict:
         try:
             with open(self.db_file, 'r') as f:
                 return json.load(f)
@@ -43,12 +89,51 @@ class IntelligenceDB:
             print(f"Error reading database: {e}")
             return {}
     
+    def _load_registry(self) -> IndicatorRegistry:
+        db = self._read_db()
+        if "indicators" not in db:
+            db["indicators"] = IndicatorRegistry.rebuild(db.get("conversations", {})).indicators
+        return IndicatorRegistry(db["indicators"])
+    
     def _write_db(self, data: Dict):
-        try:
-            with open(self.db_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error writing database: {e}")
+        self._db = data
+        self.version += 1
+        if self.writer is not None:
+            self.writer(self.db_file, data)
+            return
+        with self._file_lock:
+            try:
+                # tmp + replace, so a crash mid-write can't leave a truncated DB
+                with open(self.db_file + ".tmp", 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(self.db_file + ".tmp", self.db_file)
+                self._written_version = self.version
+            except Exception as e:
+                print(f"Error writing database: {e}")
+    
+    def _dump(self, payload: bytes, version: int):
+        """Write a pickled snapshot with tmp+replace, unless the same or a newer version is already on disk"""
+        with self._file_lock:
+            if version <= self._written_version:
+                return
+            try:
+                with open(self.db_file + ".tmp", 'w') as f:
+                    json.dump(pickle.loads(payload), f, indent=2)
+                os.replace(self.db_file + ".tmp", self.db_file)
+                self._written_version = version
+            except Exception as e:
+                print(f"Error writing database: {e}")
+    
+    async def persist(self):
+        """Write changes made with write=False without blocking the event loop"""
+        db = self._read_db()
+        self.version += 1
+        if self.writer is not None:
+            self.writer(self.db_file, db)
+            return
+        # Pickling the snapshot is cheap; the JSON encoding and the disk write happen in a thread
+        payload = pickle.dumps(db, protocol=pickle.HIGHEST_PROTOCOL)
+        await asyncio.to_thread(self._dump, payload, self.version)
     
     def save_conversation(
         self,
@@ -57,39 +142,94 @@ class IntelligenceDB:
         confidence: float,
         intelligence: Dict,
         messages: List[Dict],
-        metrics: Dict
+        metrics: Dict,
+        scam_type: str = "unknown"
     ):
         db = self._read_db()
+        previous = db["conversations"].get(conversation_id)
+        previous_intel = previous.get("intelligence_extracted", {}) if previous else {}
         
-        db["conversations"][conversation_id] = {
+        record = {
             "conversation_id": conversation_id,
             "timestamp": datetime.now().isoformat(),
             "scam_detected": scam_detected,
+            "scam_type": scam_type,
             "confidence_score": confidence,
             "total_turns": metrics.get("total_turns", 0),
             "intelligence_extracted": intelligence,
             "message_count": len(messages),
             "metrics": metrics
         }
+        db["conversations"][conversation_id] = record
         
-        for key in ["bank_accounts", "upi_ids", "phone_numbers", "urls", 
-                    "ifsc_codes", "emails", "pan_cards", "aadhaar_numbers"]:
+        new_intelligence = {}
+        repeat_count = 0
+        for key in INDICATOR_TYPES:
             if key in intelligence and intelligence[key]:
-                existing = set(db["all_intelligence"][key])
-                new_items = set(intelligence[key])
-                db["all_intelligence"][key] = list(existing | new_items)
+                new_items, repeats = self.registry.observe(
+                    key, intelligence[key], previous_intel.get(key, []), record["timestamp"]
+                )
+                if new_items:
+                    new_intelligence[key] = new_items
+                    db["all_intelligence"][key].extend(new_items)
+                repeat_count += repeats
         
-        db["statistics"]["total_conversations"] = len(db["conversations"])
-        db["statistics"]["total_scams_detected"] = sum(
-            1 for conv in db["conversations"].values() 
-            if conv.get("scam_detected", False)
-        )
-        db["statistics"]["total_intelligence_items"] = sum(
-            len(items) for items in db["all_intelligence"].values()
-        )
-        db["statistics"]["last_updated"] = datetime.now().isoformat()
+        was_scam = bool(previous and previous.get("scam_detected", False))
+        statistics = db["statistics"]
+        statistics["total_conversations"] += 0 if previous else 1
+        statistics["total_scams_detected"] += int(scam_detected) - int(was_scam)
+        statistics["total_intelligence_items"] += sum(len(items) for items in new_intelligence.values())
+        statistics["last_updated"] = datetime.now().isoformat()
         
         self._write_db(db)
+        self._notify({
+            "conversation": record,
+            "new_conversation": previous is None,
+            "scam_newly_detected": scam_detected and not was_scam,
+            "new_intelligence": new_intelligence,
+            "repeat_indicator_count": repeat_count,
+            "previous_turn": {
+                "time": datetime.fromisoformat(previous["timestamp"]).timestamp(),
+                "duration_seconds": previous.get("metrics", {}).get("conversation_duration_seconds", 0),
+                "total_turns": previous.get("metrics", {}).get("total_turns", 0)
+            } if previous else None,
+            "statistics": statistics
+        })
+    
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Call `listener` with the delta after every saved conversation"""
+        self.listeners.append(listener)
+    
+    def _notify(self, update: Dict):
+        for listener in self.listeners:
+            try:
+                listener(update)
+            except Exception as e:
+                print(f"Error notifying listener: {e}")
+    
+    def save_enrichment(self, records: Dict[str, Dict[str, Dict]], write: bool = True) -> int:
+        """
+        Merge enrichment records keyed by indicator type and raw value; returns
+        how many were new. With write=False the caller persists them via persist().
+        """
+        db = self._read_db()
+        enrichment = db.setdefault("enrichment", {})
+        
+        added = 0
+        for kind, items in records.items():
+            existing = enrichment.setdefault(kind, {})
+            for value, record in items.items():
+                if value not in existing:
+                    existing[value] = record
+                    added += 1
+        
+        if added and write:
+            self._write_db(db)
+        return added
+    
+    def get_enrichment(self) -> Dict:
+        db = self._read_db()
+        return db.get("enrichment", {})
     
     def get_all_intelligence(self) -> Dict:
         db = self._read_db()
@@ -127,22 +267,63 @@ class IntelligenceDB:
         
         return output_file
     
+    def update_conversations(self, changes: Dict[str, Dict]) -> int:
+        """
+        Apply offline re-analysis results to saved conversations in one write.
+        
+        `changes` maps conversation ids to {"intelligence": {key: [added values]}}
+        plus optional "scam_detected" and "scam_type" overrides. Returns how
+        many indicators were new to the whole DB.
+        """
+        db = self._read_db()
+        timestamp = datetime.now().isoformat()
+        
+        globally_new = 0
+        for conversation_id, change in changes.items():
+            record = db["conversations"].get(conversation_id)
+            if record is None:
+                continue
+            
+            intelligence = record.setdefault("intelligence_extracted", {})
+            for key, added in change.get("intelligence", {}).items():
+                previous = intelligence.get(key, [])
+                if key in INDICATOR_TYPES:
+                    new_items, _ = self.registry.observe(key, previous + added, previous, timestamp)
+                    db["all_intelligence"][key].extend(new_items)
+                    globally_new += len(new_items)
+                intelligence[key] = previous + added
+                if "extracted_count" in intelligence:
+                    intelligence["extracted_count"] += len(added)
+            
+            if change.get("scam_detected") and not record.get("scam_detected"):
+                record["scam_detected"] = True
+                db["statistics"]["total_scams_detected"] += 1
+            if change.get("scam_type"):
+                record["scam_type"] = change["scam_type"]
+            record["reanalyzed_at"] = timestamp
+        
+        db["statistics"]["total_intelligence_items"] += globally_new
+        db["statistics"]["last_updated"] = timestamp
+        self._write_db(db)
+        return globally_new
+    
     def clear_database(self):
         self._ensure_db_exists()
     
-    def get_high_value_intelligence(self) -> Dict:
-        all_intel = self.get_all_intelligence()
+    def get_high_value_intelligence(self, limit: int = 20) -> Dict:
+        """High-value indicators, most frequently seen first, with the top `limit` counters"""
+        ranked = {
+            key: self.registry.ranked(key)
+            for key in ["bank_accounts", "upi_ids", "phone_numbers", "urls", "ifsc_codes"]
+        }
         
         return {
-            "bank_accounts": all_intel.get("bank_accounts", []),
-            "upi_ids": all_intel.get("upi_ids", []),
-            "phone_numbers": all_intel.get("phone_numbers", []),
-            "urls": all_intel.get("urls", []),
-            "ifsc_codes": all_intel.get("ifsc_codes", []),
+            **{key: [entry["value"] for entry in entries] for key, entries in ranked.items()},
+            "top": {key: entries[:limit] for key, entries in ranked.items()},
             "count": (
-                len(all_intel.get("bank_accounts", [])) +
-                len(all_intel.get("upi_ids", [])) +
-                len(all_intel.get("phone_numbers", [])) +
-                len(all_intel.get("urls", []))
+                len(ranked["bank_accounts"]) +
+                len(ranked["upi_ids"]) +
+                len(ranked["phone_numbers"]) +
+                len(ranked["urls"])
             )
         }
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from intelligence_extractor import URL_SHORTENERS, FREE_TLDS
+from config import (
+    ENRICHMENT_WORKERS,
+    ENRICHMENT_QUEUE_SIZE,
+    ENRICHMENT_CACHE_SIZE,
+    ENRICHMENT_FLUSH_INTERVAL_SECONDS
+)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def load_public_suffixes(path: Path = DATA_DIR / "public_suffix_list.dat") -> Set[str]:
+    suffixes = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("//"):
+                suffixes.add(line.lower())
+    return suffixes
+
+
+def split_host(host: str, suffixes: Set[str]) -> Tuple[str, str]:
+    """Return (public suffix, registrable domain) for `host`"""
+    labels = host.split(".")
+    suffix = labels[-1]
+    for i in range(len(labels)):
+        candidate = ".".join(labels[i:])
+        if candidate in suffixes:
+            suffix = candidate
+            break
+
+    suffix_len = suffix.count(".") + 1
+    if len(labels) <= suffix_len:
+        return suffix, host
+    return suffix, ".".join(labels[-suffix_len - 1:])
+
+
+class IndicatorEnricher:
+    """Normalizes and canonicalizes extracted indicators using the bundled tables"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.public_suffixes = load_public_suffixes(data_dir / "public_suffix_list.dat")
+        with open(data_dir / "ifsc_banks.json", encoding="utf-8") as f:
+            self.ifsc_banks = json.load(f)
+        with open(data_dir / "upi_handles.json", encoding="utf-8") as f:
+            self.upi_handles = json.load(f)
+
+        self.enrichers = {
+            "phone_numbers": self.enrich_phone,
+            "upi_ids": self.enrich_upi,
+            "urls": self.enrich_url,
+            "ifsc_codes": self.enrich_ifsc,
+            "bank_accounts": self.enrich_bank_account,
+            "emails": self.enrich_email
+        }
+
+    def enrich(self, kind: str, value: str) -> Optional[Dict]:
+        enricher = self.enrichers.get(kind)
+        if enricher is None:
+            return None
+
+        record = enricher(value)
+        record["type"] = kind
+        record["value"] = value
+        return record
+
+    def enrich_phone(self, value: str) -> Dict:
+        digits = re.sub(r'\D', '', value)
+        if len(digits) == 12 and digits.startswith("91"):
+            digits = digits[2:]
+        elif len(digits) == 11 and digits.startswith("0"):
+            digits = digits[1:]
+
+        valid = len(digits) == 10 and digits[0] in "6789"
+        return {
+            "canonical": f"+91{digits}" if valid else digits,
+            "country": "IN" if valid else None,
+            "valid": valid
+        }
+
+    def enrich_upi(self, value: str) -> Dict:
+        handle, _, psp = value.strip().lower().partition("@")
+        info = self.upi_handles.get(psp, {})
+        return {
+            "canonical": f"{handle}@{psp}",
+            "handle": handle,
+            "psp": psp,
+            "app": info.get("app"),
+            "bank": info.get("bank"),
+            "valid": bool(handle and psp)
+        }
+
+    def enrich_url(self, value: str) -> Dict:
+        try:
+            parts = urlsplit(value.strip())
+            host = (parts.hostname or "").rstrip(".")
+            port = parts.port
+        except ValueError:
+            return {"canonical": value, "valid": False}
+
+        if not host:
+            return {"canonical": value, "valid": False}
+
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+
+        scheme = parts.scheme.lower()
+        netloc = host
+        if port and not (scheme == "http" and port == 80) and not (scheme == "https" and port == 443):
+            netloc = f"{host}:{port}"
+
+        suffix, domain = split_host(host, self.public_suffixes)
+        is_ip = bool(re.fullmatch(r'\d{1,3}(?:\.\d{1,3}){3}', host))
+        return {
+            "canonical": urlunsplit((scheme, netloc, parts.path or "/", parts.query, "")),
+            "host": host,
+            "registered_domain": host if is_ip else domain,
+            "public_suffix": None if is_ip else suffix,
+            "is_ip_address": is_ip,
+            "is_shortener": domain in URL_SHORTENERS,
+            "free_tld": suffix in FREE_TLDS,
+            "punycode": "xn--" in host,
+            "valid": True
+        }
+
+    def enrich_ifsc(self, value: str) -> Dict:
+        code = value.strip().upper()
+        return {
+            "canonical": code,
+            "bank_code": code[:4],
+            "branch_code": code[5:],
+            "bank": self.ifsc_banks.get(code[:4]),
+            "valid": len(code) == 11 and code[4] == "0"
+        }
+
+    def enrich_bank_account(self, value: str) -> Dict:
+        digits = re.sub(r'\D', '', value)
+        return {
+            "canonical": digits,
+            "length": len(digits),
+            "valid": 9 <= len(digits) <= 18
+        }
+
+    def enrich_email(self, value: str) -> Dict:
+        local, _, domain = value.strip().lower().partition("@")
+        return {
+            "canonical": f"{local}@{domain}",
+            "domain": domain,
+            "registered_domain": split_host(domain, self.public_suffixes)[1] if domain else None,
+            "valid": bool(local and domain)
+        }
+
+
+class EnrichmentPipeline:
+    """
+    Enriches indicators off the request path.
+
+    /detect only drops a job on a bounded queue; a small pool of worker tasks
+    enriches the indicators in threads. Results are merged into the DB in one
+    batch every ENRICHMENT_FLUSH_INTERVAL_SECONDS and written off the event
+    loop. If the queue is full the job is dropped rather than slowing down
+    the reply.
+    """
+
+    def __init__(
+        self,
+        intelligence_db,
+        enricher: Optional[IndicatorEnricher] = None,
+        workers: int = ENRICHMENT_WORKERS,
+        queue_size: int = ENRICHMENT_QUEUE_SIZE,
+        cache_size: int = ENRICHMENT_CACHE_SIZE,
+        flush_interval: float = ENRICHMENT_FLUSH_INTERVAL_SECONDS
+    ):
+        self.intelligence_db = intelligence_db
+        self.enricher = enricher or IndicatorEnricher()
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.cache: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, Dict[str, Dict]] = {}
+        self.stats = {
+            "jobs_queued": 0,
+            "jobs_dropped": 0,
+            "jobs_processed": 0,
+            "indicators_enriched": 0,
+            "batches_written": 0,
+            "cache_hits": 0,
+            "cache_misses": 0
+        }
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flusher()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    def submit(self, intelligence: Dict) -> bool:
+        """Queue the not-yet-enriched indicators from one extraction; never blocks"""
+        items = []
+        for kind in self.enricher.enrichers:
+            for value in intelligence.get(kind, []):
+                if (kind, value) in self.cache:
+                    self.stats["cache_hits"] += 1
+                else:
+                    items.append((kind, value))
+        if not items:
+            return True
+
+        try:
+            self.queue.put_nowait(items)
+        except asyncio.QueueFull:
+            self.stats["jobs_dropped"] += 1
+            return False
+
+        self.stats["jobs_queued"] += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            items = await self.queue.get()
+            try:
+                await self._process(items)
+            except Exception as e:
+                print(f"Enrichment error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, items: List[Tuple[str, str]]):
+        misses = []
+        for key in items:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+            else:
+                self.stats["cache_misses"] += 1
+                misses.append(key)
+
+        # The lookups run in a thread; the cache and the pending batch are only touched on the loop
+        for key, record in await asyncio.to_thread(self._enrich, misses):
+            kind, value = key
+            self._pending.setdefault(kind, {})[value] = record
+            self._cache_put(key, record)
+        self.stats["jobs_processed"] += 1
+
+    def _enrich(self, keys: List[Tuple[str, str]]) -> List[Tuple[Tuple[str, str], Dict]]:
+        results = []
+        for kind, value in keys:
+            record = self.enricher.enrich(kind, value)
+            if record is not None:
+                record["enriched_at"] = datetime.now().isoformat()
+                results.append(((kind, value), record))
+        return results
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Enrichment flush error: {e}")
+
+    async def flush(self):
+        """Merge the pending results into the DB in one batch and persist it off the loop"""
+        if not self._pending:
+            return
+        records, self._pending = self._pending, {}
+        added = self.intelligence_db.save_enrichment(records, write=False)
+        if added:
+            self.stats["indicators_enriched"] += added
+            self.stats["batches_written"] += 1
+            await self.intelligence_db.persist()
+
+    def _cache_put(self, key: Tuple[str, str], record: Dict):
+        self.cache[key] = record
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "queue_depth": self.queue.qsize(),
+            "pending_indicators": sum(len(items) for items in self._pending.values()),
+            "cache_size": len(self.cache)
+        }
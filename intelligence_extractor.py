@@ -1,5 +1,15 @@
 import re
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple
+from urllib.parse import urlsplit
+
+from pattern_packs import load_pattern_packs, normalize_text
+
+
+URL_SHORTENERS = {
+    "bit.ly", "tinyurl.com", "goo.gl", "t.co", "is.gd", "cutt.ly",
+    "rb.gy", "shorturl.at", "ow.ly", "rebrand.ly", "t.ly", "tiny.cc"
+}
+FREE_TLDS = {"tk", "ml", "ga", "cf", "gq"}
 
 
 class IntelligenceExtractor:
@@ -14,25 +24,43 @@ class IntelligenceExtractor:
             "pan_card": r'\b[A-Z]{5}[0-9]{4}[A-Z]\b',
             "aadhaar": r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}\b'
         }
+        self.compiled_patterns = {
+            name: re.compile(pattern, re.IGNORECASE)
+            for name, pattern in self.patterns.items()
+        }
         
         self.upi_handles = [
             "@paytm", "@oksbi", "@ybl", "@okicici", "@okaxis",
             "@okhdfcbank", "@ibl", "@axl", "@fbl", "@upi"
         ]
         
-        self.bank_names = [
-            "sbi", "hdfc", "icici", "axis", "kotak", "pnb",
-            "canara", "bank of baroda", "union bank", "idbi"
-        ]
+        # Bank names and impersonation targets come from the language packs
+        self.packs = load_pattern_packs()
     
     def extract(self, history: List[Dict], current_message: str) -> Dict:
         all_text = current_message + " "
         for msg in history:
             all_text += msg.get("content", "") + " "
         
-        all_text = all_text.lower()
+        return self._count(self._extract_text(all_text, history))
+    
+    def extract_messages(self, messages: List[Dict]) -> Dict:
+        """Intelligence found in `messages` alone, for folding into earlier results with `merge`"""
+        all_text = " ".join(msg.get("content", "") for msg in messages)
+        return self._extract_text(all_text, messages)
+    
+    def merge(self, found: Dict[str, Set[str]], partial: Dict) -> Dict:
+        """Fold `partial` into the running `found` sets and return the combined extraction"""
+        for key, values in partial.items():
+            found.setdefault(key, set()).update(values)
+        
+        return self._count({key: list(values) for key, values in found.items()})
+    
+    def _extract_text(self, raw_text: str, history: List[Dict]) -> Dict:
+        all_text = normalize_text(raw_text)
+        matches = self.packs.match(raw_text)
         
-        intelligence = {
+        return {
             "bank_accounts": self._extract_unique(all_text, "bank_account"),
             "ifsc_codes": self._extract_unique(all_text, "ifsc_code"),
             "phone_numbers": self._extract_unique(all_text, "phone"),
@@ -41,11 +69,12 @@ class IntelligenceExtractor:
             "urls": self._extract_unique(all_text, "url"),
             "pan_cards": self._extract_unique(all_text, "pan_card"),
             "aadhaar_numbers": self._extract_unique(all_text, "aadhaar"),
-            "bank_names": self._extract_bank_names(all_text),
-            "company_names": self._extract_company_names(all_text),
-            "scammer_claims": self._extract_claims(history),
-            "extracted_count": 0
+            "bank_names": self._labels(matches, "bank"),
+            "company_names": self._labels(matches, "company"),
+            "scammer_claims": self._extract_claims(history)
         }
+    
+    def _count(self, intelligence: Dict) -> Dict:
         intelligence["extracted_count"] = sum(
             len(v) if isinstance(v, list) else 0
             for k, v in intelligence.items()
@@ -56,11 +85,11 @@ class IntelligenceExtractor:
     
     def _extract_unique(self, text: str, pattern_type: str) -> List[str]:
     
-        pattern = self.patterns.get(pattern_type)
+        pattern = self.compiled_patterns.get(pattern_type)
         if not pattern:
             return []
         
-        matches = re.findall(pattern, text, re.IGNORECASE)
+        matches = pattern.findall(text)
         
         unique_matches = list(set(matches))
         
@@ -91,46 +120,31 @@ class IntelligenceExtractor:
     
     def _is_suspicious_url(self, url: str) -> bool:
         """Check if URL looks suspicious/phishing"""
-        suspicious_indicators = [
-            "bit.ly", "tinyurl", "goo.gl",  # URL shorteners
-            "tk", "ml", "ga", "cf", "gq",  # Free domains
-            ".zip", ".rar", ".exe",  # Suspicious extensions
-            "verify", "confirm", "login", "secure", "account"  # Phishing keywords
-        ]
-        
         url_lower = url.lower()
-        return any(indicator in url_lower for indicator in suspicious_indicators)
-    
-    def _extract_bank_names(self, text: str) -> List[str]:
-        found_banks = []
-        for bank in self.bank_names:
-            if bank in text:
-                found_banks.append(bank.upper())
+        try:
+            parts = urlsplit(url_lower)
+            host = (parts.hostname or "").rstrip(".")
+        except ValueError:
+            return False
         
-        return list(set(found_banks))
-    
-    def _extract_company_names(self, text: str) -> List[str]:
-        companies = []
-        
-        # Common impersonation targets
-        common_targets = [
-            "amazon", "flipkart", "paytm", "google pay", "phonepe",
-            "income tax", "tax department", "police", "cyber cell",
-            "rbi", "reserve bank", "government", "ministry"
-        ]
+        if host in URL_SHORTENERS or host.rsplit(".", 1)[-1] in FREE_TLDS:
+            return True
         
-        for company in common_targets:
-            if company in text:
-                companies.append(company.title())
+        if parts.path.endswith((".zip", ".rar", ".exe", ".apk")):
+            return True
         
-        return list(set(companies))
+        phishing_keywords = ["verify", "confirm", "login", "secure", "account", "kyc"]
+        return any(keyword in url_lower for keyword in phishing_keywords)
+    
+    def _labels(self, matches: List[Tuple[str, str, str]], kind: str) -> List[str]:
+        return list({label for k, label, _ in matches if k == kind})
     
     def _extract_claims(self, history: List[Dict]) -> List[str]:
         claims = []
         
         for msg in history:
             if msg.get("role") == "scammer":
-                content = msg.get("content", "").lower()
+                content = normalize_text(msg.get("content", ""))
                 
                 # Extract claim patterns
                 if "refund" in content or "cashback" in content:
@@ -148,7 +162,7 @@ class IntelligenceExtractor:
                 if "urgent" in content or "immediately" in content:
                     claims.append("Creates urgency")
                 
-                if any(bank in content for bank in self.bank_names):
+                if self.packs.labels_of(content, "bank"):
                     claims.append("Claims to be from bank")
                 
                 if "government" in content or "police" in content or "tax" in content:
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import ROLLUP_FILE, ROLLUP_FLUSH_INTERVAL_SECONDS, ROLLUP_RETENTION
+
+GRANULARITY_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+def new_bucket(start: int) -> Dict:
+    return {
+        "start": start,
+        "turns_saved": 0,
+        "scams_detected": 0,
+        "scams_by_type": {},
+        "new_indicators": 0,
+        "repeat_indicators": 0,
+        # Conversations with a turn in the bucket, and the sums of their latest duration and turns
+        "conversations": 0,
+        "duration_sum": 0.0,
+        "turns_sum": 0
+    }
+
+
+def upgrade_bucket(bucket: Dict) -> Dict:
+    """Replace the per-conversation map older rollup files kept with running sums"""
+    engagement = bucket.pop("engagement", None)
+    if engagement is not None:
+        bucket["conversations"] = len(engagement)
+        bucket["duration_sum"] = sum(e[0] for e in engagement.values())
+        bucket["turns_sum"] = sum(e[1] for e in engagement.values())
+    return bucket
+
+
+class RollupStore:
+    """
+    Minute, hour and day rollups of saved conversation turns.
+
+    Registered as an IntelligenceDB listener, so each saved turn touches one
+    bucket per granularity and never rescans the DB. Buckets older than the
+    configured retention are dropped, and the whole store is flushed to its
+    own JSON file next to the DB.
+    """
+
+    def __init__(self, rollup_file: str = ROLLUP_FILE, retention: Dict[str, int] = ROLLUP_RETENTION):
+        self.rollup_file = rollup_file
+        self.retention = retention
+        self.buckets: Dict[str, Dict[int, Dict]] = {name: {} for name in GRANULARITY_SECONDS}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.rollup_file):
+            return
+        try:
+            with open(self.rollup_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error reading rollups: {e}")
+            return
+
+        for name in GRANULARITY_SECONDS:
+            buckets = sorted(data.get(name, []), key=lambda b: b["start"])
+            self.buckets[name] = {bucket["start"]: upgrade_bucket(bucket) for bucket in buckets}
+
+    def record(self, update: Dict):
+        """IntelligenceDB listener: fold one saved turn into the current buckets"""
+        conversation = update["conversation"]
+        metrics = conversation.get("metrics", {})
+        duration = metrics.get("conversation_duration_seconds", 0)
+        turns = metrics.get("total_turns", 0)
+        previous = update.get("previous_turn")
+        now = time.time()
+        new_indicators = sum(len(items) for items in update["new_intelligence"].values())
+
+        for name, seconds in GRANULARITY_SECONDS.items():
+            bucket = self._bucket(name, int(now // seconds * seconds))
+            bucket["turns_saved"] += 1
+            bucket["new_indicators"] += new_indicators
+            bucket["repeat_indicators"] += update["repeat_indicator_count"]
+            if update["scam_newly_detected"]:
+                scam_type = conversation.get("scam_type", "unknown")
+                bucket["scams_detected"] += 1
+                bucket["scams_by_type"][scam_type] = bucket["scams_by_type"].get(scam_type, 0) + 1
+            if previous is not None and previous["time"] >= bucket["start"]:
+                # Already counted in this bucket: swap its previous figures for the latest
+                bucket["duration_sum"] += duration - previous["duration_seconds"]
+                bucket["turns_sum"] += turns - previous["total_turns"]
+            else:
+                bucket["conversations"] += 1
+                bucket["duration_sum"] += duration
+                bucket["turns_sum"] += turns
+
+        self.dirty = True
+
+    def _bucket(self, name: str, start: int) -> Dict:
+        buckets = self.buckets[name]
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = new_bucket(start)
+            # Buckets are created in time order, so the oldest is always first
+            while len(buckets) > self.retention[name]:
+                del buckets[next(iter(buckets))]
+        return bucket
+
+    def query(
+        self,
+        granularity: str = "hour",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Buckets overlapping [start, end), oldest first, with averages filled in.
+        `limit` keeps the latest buckets and only applies when no range is given.
+        """
+        seconds = GRANULARITY_SECONDS[granularity]
+        results = []
+        for bucket_start, bucket in self.buckets[granularity].items():
+            if start is not None and bucket_start + seconds <= start:
+                continue
+            if end is not None and bucket_start >= end:
+                continue
+            results.append(self._summarize(bucket, seconds))
+
+        if start is None and end is None and limit is not None and limit > 0:
+            results = results[-limit:]
+        return results
+
+    def _summarize(self, bucket: Dict, seconds: int) -> Dict:
+        conversations = bucket["conversations"]
+        return {
+            "start": datetime.fromtimestamp(bucket["start"]).isoformat(),
+            "end": datetime.fromtimestamp(bucket["start"] + seconds).isoformat(),
+            "turns_saved": bucket["turns_saved"],
+            "active_conversations": conversations,
+            "scams_detected": bucket["scams_detected"],
+            "scams_by_type": bucket["scams_by_type"],
+            "new_indicators": bucket["new_indicators"],
+            "repeat_indicators": bucket["repeat_indicators"],
+            "avg_conversation_duration_seconds": (
+                round(bucket["duration_sum"] / conversations, 2) if conversations else 0
+            ),
+            "avg_total_turns": (
+                round(bucket["turns_sum"] / conversations, 2) if conversations else 0
+            )
+        }
+
+    def _snapshot(self) -> Dict[str, List[Dict]]:
+        return {
+            name: [{**bucket, "scams_by_type": dict(bucket["scams_by_type"])} for bucket in buckets.values()]
+            for name, buckets in self.buckets.items()
+        }
+
+    def _write(self, data: Dict[str, List[Dict]]):
+        try:
+            with open(self.rollup_file + ".tmp", 'w') as f:
+                json.dump(data, f)
+            os.replace(self.rollup_file + ".tmp", self.rollup_file)
+        except Exception as e:
+            self.dirty = True
+            print(f"Error writing rollups: {e}")
+
+    async def flush_async(self):
+        """Copy the buckets on the loop, serialize and write them in a thread"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        await asyncio.to_thread(self._write, self._snapshot())
+
+    async def run_flusher(self, interval: float = ROLLUP_FLUSH_INTERVAL_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush_async()
+
+    def get_stats(self) -> Dict:
+        return {name: len(buckets) for name, buckets in self.buckets.items()}
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from typing import Any, Dict, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from config import LIVE_UPDATE_QUEUE_SIZE
+
+
+class Subscription:
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, text: str):
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broadcaster:
+    """
+    Topic based fan-out for WebSocket clients.
+
+    Each event is serialized once and the same string is queued for every
+    subscriber, so an update costs one json.dumps however many viewers are
+    connected. A subscriber that falls a full queue behind is disconnected
+    and has to reconnect for a fresh snapshot.
+    """
+
+    def __init__(self, queue_size: int = LIVE_UPDATE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self.stats = {
+            "events_published": 0,
+            "messages_delivered": 0,
+            "overflow_disconnects": 0
+        }
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic, self.queue_size)
+        self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscriptions.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscriptions[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._subscriptions
+
+    def publish(self, topic: str, event: Dict[str, Any]):
+        subscribers = self._subscriptions.get(topic)
+        if not subscribers:
+            return
+
+        text = json.dumps(event, default=str)
+        self.stats["events_published"] += 1
+        for subscription in subscribers:
+            subscription.put(text)
+        self.stats["messages_delivered"] += len(subscribers)
+
+    async def pump(self, websocket: WebSocket, subscription: Subscription):
+        """Forward queued events to the socket until it closes or overflows"""
+        while True:
+            if subscription.overflowed:
+                self.stats["overflow_disconnects"] += 1
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(await subscription.queue.get())
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "topics": len(self._subscriptions),
+            "subscribers": sum(len(s) for s in self._subscriptions.values())
+        }
+
+
+async def wait_for_disconnect(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
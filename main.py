@@ -1,18 +1,157 @@
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
+import requests
 from datetime import datetime
+import hashlib
 import json
+import time
 
 from scam_detector import ScamDetector
 from agent_engine import AgentEngine
 from intelligence_extractor import IntelligenceExtractor
-from intelligence_db import IntelligenceDB
-from config import API_KEY
+from analysis_pool import AnalysisPool
+from engagement_scheduler import EngagementScheduler, FULL, LIGHT
+from intelligence_db import IntelligenceDB, lock_db
+from conversation_mailbox import MailboxRouter
+from model_router import ModelRouter
+from intelligence_enrichment import EnrichmentPipeline
+from live_updates import Broadcaster, wait_for_disconnect
+from conversation import Conversation, Role
+from transcript_store import TranscriptStore
+from intelligence_rollups import RollupStore, GRANULARITY_SECONDS
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from reply_cache import ReplyCache
+from config import (
+    API_KEY,
+    WARMUP_TIMEOUT_SECONDS,
+    WARMUP_RETRIES,
+    WARMUP_RETRY_DELAY_SECONDS,
+    WARMUP_MAX_RETRY_DELAY_SECONDS
+)
+
+model_router: Optional[ModelRouter] = None
+scam_detector: Optional[ScamDetector] = None
+agent_engine: Optional[AgentEngine] = None
+intelligence_extractor: Optional[IntelligenceExtractor] = None
+analysis_pool: Optional[AnalysisPool] = None
+engagement_scheduler: Optional[EngagementScheduler] = None
+intelligence_db: Optional[IntelligenceDB] = None
+enrichment_pipeline: Optional[EnrichmentPipeline] = None
+transcript_store: Optional[TranscriptStore] = None
+rollup_store: Optional[RollupStore] = None
+rate_limiter: Optional[RateLimiter] = None
+response_cache: Optional[ResponseCache] = None
+reply_cache: Optional[ReplyCache] = None
+conversation_store: Dict[str, Conversation] = {}
+broadcaster = Broadcaster()
+
+warmup_state: Dict[str, Any] = {
+    "status": "pending",
+    "models": [],
+    "started_at": None,
+    "finished_at": None,
+    "duration_seconds": None,
+    "attempts": 0,
+    "error": None
+}
+
+
+async def warm_up_models():
+    """
+    Load every model we route to into Ollama memory before serving traffic.
+    
+    After WARMUP_RETRIES failed attempts the state is "failed", but warm-up
+    keeps retrying with a backoff capped at WARMUP_MAX_RETRY_DELAY_SECONDS,
+    so /readyz recovers on its own once Ollama comes back.
+    """
+    models = model_router.models()
+    warmup_state["status"] = "warming"
+    warmup_state["models"] = models
+    warmup_state["started_at"] = datetime.now().isoformat()
+    
+    total = 0.0
+    for model in models:
+        delay = WARMUP_RETRY_DELAY_SECONDS
+        attempt = 0
+        while True:
+            attempt += 1
+            warmup_state["attempts"] += 1
+            try:
+                total += await asyncio.to_thread(
+                    model_router.warm_up, model, WARMUP_TIMEOUT_SECONDS
+                )
+                break
+            except requests.exceptions.RequestException as e:
+                warmup_state["error"] = str(e)
+                print(f"Warm-up of {model} failed (attempt {attempt}), retrying in {delay}s: {e}")
+                if attempt >= WARMUP_RETRIES:
+                    warmup_state["status"] = "failed"
+                    warmup_state["finished_at"] = datetime.now().isoformat()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY_SECONDS)
+    
+    warmup_state["status"] = "ready"
+    warmup_state["error"] = None
+    warmup_state["finished_at"] = datetime.now().isoformat()
+    warmup_state["duration_seconds"] = round(total, 3)
+
 
-app = FastAPI(title="Agentic Honey-Pot API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global model_router, scam_detector, agent_engine, intelligence_extractor, intelligence_db
+    global enrichment_pipeline, transcript_store, rollup_store, analysis_pool, engagement_scheduler
+    global rate_limiter, response_cache, reply_cache
+    
+    rate_limiter = RateLimiter()
+    response_cache = ResponseCache()
+    model_router = ModelRouter()
+    intelligence_extractor = IntelligenceExtractor()
+    analysis_pool = AnalysisPool(intelligence_extractor)
+    scam_detector = ScamDetector(model_router, analysis_pool)
+    reply_cache = ReplyCache(model_router)
+    agent_engine = AgentEngine(model_router, reply_cache)
+    engagement_scheduler = EngagementScheduler(model_router)
+    intelligence_db = IntelligenceDB(
+        writer=analysis_pool.save_json if analysis_pool.writer is not None else None
+    )
+    # Held while serving, so offline jobs like reanalyze.py won't rewrite the DB under us
+    db_lock = lock_db(intelligence_db.db_file)
+    if db_lock is None:
+        raise RuntimeError(f"{intelligence_db.db_file} is locked by another process (is reanalyze.py running?)")
+    transcript_store = TranscriptStore()
+    enrichment_pipeline = EnrichmentPipeline(intelligence_db)
+    enrichment_pipeline.start()
+    rollup_store = RollupStore()
+    intelligence_db.add_listener(rollup_store.record)
+    intelligence_db.add_listener(
+        lambda update: broadcaster.publish("intelligence", {"type": "update", **update})
+    )
+    
+    warmup_task = asyncio.create_task(warm_up_models())
+    health_task = asyncio.create_task(model_router.health_check_loop())
+    transcript_task = asyncio.create_task(transcript_store.run_maintenance())
+    rollup_task = asyncio.create_task(rollup_store.run_flusher())
+    yield
+    warmup_task.cancel()
+    health_task.cancel()
+    transcript_task.cancel()
+    rollup_task.cancel()
+    reply_cache.close()
+    await enrichment_pipeline.stop()
+    transcript_store.close()
+    await rollup_store.flush_async()
+    await analysis_pool.close()
+    db_lock.close()
+
+
+app = FastAPI(title="Agentic Honey-Pot API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,12 +161,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-scam_detector = ScamDetector()
-agent_engine = AgentEngine()
-intelligence_extractor = IntelligenceExtractor()
-intelligence_db = IntelligenceDB()  
-conversation_store: Dict[str, List[Dict]] = {}
-
 
 class Message(BaseModel):
     conversation_id: str
@@ -39,7 +172,9 @@ class Message(BaseModel):
 class IncomingRequest(BaseModel):
     conversation_id: str
     message: str
-    history: Optional[List[Dict]] = []
+    history: Optional[List[Dict]] = []  # Ignored - the server keeps its own history
+    seq: Optional[int] = None  # Number of messages the client sent before this one
+    history_digest: Optional[str] = None  # Digest of those messages, see chain_digest
 
 
 class ResponseOutput(BaseModel):
@@ -50,6 +185,46 @@ class ResponseOutput(BaseModel):
     extracted_intelligence: Dict[str, Any]
     engagement_metrics: Dict[str, Any]
     confidence_score: float
+    next_seq: Optional[int] = None
+    history_digest: Optional[str] = None
+
+
+def chain_digest(previous: str, content: str) -> str:
+    """Rolling digest over the incoming messages of a conversation"""
+    return hashlib.sha256(f"{previous}\x1f{content}".encode("utf-8")).hexdigest()[:16]
+
+
+def accept_message(
+    conversation_id: str,
+    message: str,
+    seq: Optional[int],
+    history_digest: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Check the client's view of the conversation against ours and record the
+    new message. Raises 409 with the missing range if the two have diverged.
+    """
+    conversation = conversation_store.setdefault(conversation_id, Conversation())
+    
+    if seq is not None and seq != conversation.seq:
+        raise HTTPException(status_code=409, detail={
+            "error": "sequence_mismatch",
+            "expected_seq": conversation.seq,
+            "history_digest": conversation.digest,
+            "missing_on": "server" if seq > conversation.seq else "client",
+            "missing_range": [min(seq, conversation.seq), max(seq, conversation.seq) - 1]
+        })
+    
+    if history_digest is not None and history_digest != conversation.digest:
+        raise HTTPException(status_code=409, detail={
+            "error": "history_digest_mismatch",
+            "expected_seq": conversation.seq,
+            "history_digest": conversation.digest
+        })
+    
+    conversation.seq += 1
+    conversation.digest = chain_digest(conversation.digest, message)
+    return {"next_seq": conversation.seq, "history_digest": conversation.digest}
 
 
 def verify_api_key(x_api_key: str = Header(...)):
@@ -58,6 +233,18 @@ def verify_api_key(x_api_key: str = Header(...)):
     return x_api_key
 
 
+async def enforce_rate_limit(api_key: str, client_ip: Optional[str], conversation_id: str):
+    """Refuse with 429 before any detection, LLM or storage work is done for the message"""
+    throttled = await rate_limiter.check(conversation=conversation_id, ip=client_ip, api_key=api_key)
+    if throttled:
+        scope, retry_after = throttled
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded ({scope})",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+        )
+
+
 @app.get("/")
 async def root():
     return {
@@ -67,73 +254,122 @@ async def root():
     }
 
 
-@app.post("/detect", response_model=ResponseOutput)
-async def detect_and_engage(
-    request: IncomingRequest,
+@app.get("/healthz")
+async def healthz():
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    if warmup_state["status"] != "ready":
+        return JSONResponse(status_code=503, content={"status": "not_ready"})
+    return {"status": "ready"}
+
+
+@app.get("/system/stats")
+async def get_system_stats(
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
-  
     verify_api_key(x_api_key)
+    return {
+        "warmup": warmup_state,
+        "mailboxes": mailbox_router.stats,
+        "models": model_router.stats(),
+        "classifier": scam_detector.get_stats(),
+        "enrichment": enrichment_pipeline.get_stats(),
+        "live_updates": broadcaster.get_stats(),
+        "transcripts": transcript_store.get_stats(),
+        "rollups": rollup_store.get_stats(),
+        "analysis": analysis_pool.get_stats(),
+        "engagement": engagement_scheduler.get_stats(),
+        "rate_limits": rate_limiter.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "reply_cache": reply_cache.get_stats()
+    }
+
+
+async def process_turn(conversation_id: str, messages: List[Dict]) -> ResponseOutput:
+    """Run one turn; `messages` holds every scammer message coalesced into it"""
+    full_history = conversation_store.setdefault(conversation_id, Conversation())
+    full_history.extend(messages)
+    # Appends (and the batched fsync) run in a thread so the loop never waits on the disk
+    await asyncio.to_thread(
+        transcript_store.append,
+        conversation_id,
+        [(Role.SCAMMER, m["content"], m["timestamp"]) for m in messages]
+    )
     
-    conversation_id = request.conversation_id
-    incoming_message = request.message
-    history = request.history or []
-    
-    if conversation_id not in conversation_store:
-        conversation_store[conversation_id] = []
-    
-    conversation_store[conversation_id].append({
-        "role": "scammer",
-        "content": incoming_message,
-        "timestamp": datetime.now().isoformat()
-    })
+    incoming_message = "\n".join(m["content"] for m in messages)
     
-    full_history = conversation_store[conversation_id]
+    on_token = None
+    topic = f"conversation:{conversation_id}"
+    if broadcaster.has_subscribers(topic):
+        on_token = lambda piece: broadcaster.publish(topic, {"type": "token", "content": piece})
     
-    scam_result = await scam_detector.analyze(incoming_message, full_history)
+    tier = engagement_scheduler.plan(conversation_id)
+    use_llm = tier in (FULL, LIGHT)
+    scam_result = await scam_detector.analyze(incoming_message, full_history, use_llm=use_llm)
     
     scam_detected = scam_result["is_scam"]
     confidence = scam_result["confidence"]
     scam_type = scam_result.get("scam_type", "unknown")
     
-    if scam_detected and confidence > 0.6:
+    if not use_llm:
+        # Pattern-only turn: keep the verdict earlier turns reached with the LLM
+        previous = intelligence_db.get_conversation(conversation_id)
+        scam_detected = scam_detected or previous.get("scam_detected", False)
+        confidence = max(confidence, previous.get("confidence_score", 0.0))
+        if scam_type == "unknown":
+            scam_type = previous.get("scam_type", "unknown")
+    
+    agent_activated = scam_detected and confidence > 0.6
+    started = time.monotonic()
+    
+    if not use_llm:
+        # Low-yield conversation: answer without spending inference on it
+        response_message = engagement_scheduler.template_reply(conversation_id, tier, agent_activated)
+        if on_token is not None:
+            on_token(response_message)
+        
+    elif agent_activated:
 
         agent_response = await agent_engine.generate_response(
             message=incoming_message,
             history=full_history,
             scam_type=scam_type,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            on_token=on_token,
+            task="engagement" if tier == FULL else "engagement_light"
         )
         
         response_message = agent_response["message"]
-        agent_activated = True
-        
-        conversation_store[conversation_id].append({
-            "role": "agent",
-            "content": response_message,
-            "timestamp": datetime.now().isoformat()
-        })
         
     else:
-        response_message = await agent_engine.generate_neutral_probe(incoming_message)
-        agent_activated = False
-        
-        conversation_store[conversation_id].append({
-            "role": "agent",
-            "content": response_message,
-            "timestamp": datetime.now().isoformat()
-        })
+        response_message = await agent_engine.generate_neutral_probe(incoming_message, on_token)
+    
+    llm_seconds = time.monotonic() - started if use_llm else 0.0
+    
+    full_history.append(Role.AGENT, response_message)
+    await asyncio.to_thread(
+        transcript_store.append,
+        conversation_id,
+        [(Role.AGENT, response_message, full_history.last_timestamp)]
+    )
     
-    extracted_intel = intelligence_extractor.extract(
+    # Only this turn's messages are scanned; earlier turns are already in full_history.intelligence
+    extracted_intel = await analysis_pool.extract(
         full_history,
-        incoming_message
+        messages + [{"role": "agent", "content": response_message}]
     )
     
+    engagement_scheduler.record(conversation_id, llm_seconds, extracted_intel)
+    
     engagement_metrics = {
-        "total_turns": len(full_history),
-        "agent_turns": len([m for m in full_history if m.get("role") == "agent"]),
-        "conversation_duration_seconds": calculate_duration(full_history),
-        "intelligence_items_found": len([v for v in extracted_intel.values() if v])
+        "total_turns": full_history.total_turns,
+        "agent_turns": full_history.agent_turns,
+        "conversation_duration_seconds": full_history.duration_seconds,
+        "intelligence_items_found": len([v for v in extracted_intel.values() if v]),
+        "engagement_tier": tier
     }
     
     intelligence_db.save_conversation(
@@ -142,8 +378,10 @@ async def detect_and_engage(
         confidence=confidence,
         intelligence=extracted_intel,
         messages=full_history,
-        metrics=engagement_metrics
+        metrics=engagement_metrics,
+        scam_type=scam_type
     )
+    enrichment_pipeline.submit(extracted_intel)
     
     return ResponseOutput(
         conversation_id=conversation_id,
@@ -156,16 +394,118 @@ async def detect_and_engage(
     )
 
 
-def calculate_duration(history: List[Dict]) -> int:
-    if len(history) < 2:
-        return 0
+mailbox_router = MailboxRouter(process_turn)
+
+
+@app.post("/detect", response_model=ResponseOutput)
+async def detect_and_engage(
+    request: IncomingRequest,
+    http_request: Request,
+    x_api_key: str = Header(..., alias="X-API-Key")
+):
+  
+    verify_api_key(x_api_key)
+    client_ip = http_request.client.host if http_request.client else None
+    await enforce_rate_limit(x_api_key, client_ip, request.conversation_id)
+    
+    sequence = accept_message(
+        request.conversation_id,
+        request.message,
+        request.seq,
+        request.history_digest
+    )
+    
+    result = await mailbox_router.submit(request.conversation_id, request.message)
+    return result.model_copy(update=sequence)
+
+
+def websocket_authorized(websocket: WebSocket) -> bool:
+    # Browsers can't set headers on WebSockets, so the key may also come as ?api_key=
+    key = websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")
+    return key == API_KEY
+
+
+@app.websocket("/ws/conversation/{conversation_id}")
+async def conversation_socket(websocket: WebSocket, conversation_id: str):
+    """
+    Live honeypot session. Send {"message", "seq"?, "history_digest"?};
+    agent tokens arrive as {"type": "token"} events and every turn ends with
+    {"type": "result"} carrying the same fields as /detect.
+    """
+    if not websocket_authorized(websocket):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    
+    api_key = websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")
+    client_ip = websocket.client.host if websocket.client else None
+    subscription = broadcaster.subscribe(f"conversation:{conversation_id}")
+    pump = asyncio.create_task(broadcaster.pump(websocket, subscription))
+    turns = set()
+    
+    async def run_turn(payload: Dict):
+        try:
+            await enforce_rate_limit(api_key, client_ip, conversation_id)
+            sequence = accept_message(
+                conversation_id,
+                payload["message"],
+                payload.get("seq"),
+                payload.get("history_digest")
+            )
+            result = await mailbox_router.submit(conversation_id, payload["message"])
+            event = {"type": "result", **result.model_copy(update=sequence).model_dump()}
+        except HTTPException as e:
+            event = {"type": "error", "status": e.status_code, "detail": e.detail}
+            if e.status_code == 429:
+                event["retry_after"] = int(e.headers["Retry-After"])
+        except Exception as e:
+            event = {"type": "error", "status": 500, "detail": str(e)}
+        subscription.put(json.dumps(event))
+    
+    try:
+        while True:
+            try:
+                payload = json.loads(await websocket.receive_text())
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict) or not isinstance(payload.get("message"), str):
+                subscription.put(json.dumps({"type": "error", "status": 422, "detail": "message is required"}))
+                continue
+            task = asyncio.create_task(run_turn(payload))
+            turns.add(task)
+            task.add_done_callback(turns.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(subscription)
+        pump.cancel()
+
+
+@app.websocket("/ws/intelligence")
+async def intelligence_socket(websocket: WebSocket, limit: int = 50):
+    """
+    Dashboard feed. Starts with a {"type": "snapshot"} of the statistics and
+    recent conversations, then pushes an {"type": "update"} delta for every
+    saved turn.
+    """
+    if not websocket_authorized(websocket):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    
+    subscription = broadcaster.subscribe("intelligence")
+    await websocket.send_json({
+        "type": "snapshot",
+        "statistics": intelligence_db.get_statistics(),
+        "conversations": intelligence_db.get_conversations(limit=limit)
+    })
     
+    pump = asyncio.create_task(broadcaster.pump(websocket, subscription))
     try:
-        first = datetime.fromisoformat(history[0]["timestamp"])
-        last = datetime.fromisoformat(history[-1]["timestamp"])
-        return int((last - first).total_seconds())
-    except:
-        return 0
+        await wait_for_disconnect(websocket)
+    finally:
+        broadcaster.unsubscribe(subscription)
+        pump.cancel()
 
 
 @app.get("/conversation/{conversation_id}")
@@ -175,60 +515,130 @@ async def get_conversation(
 ):
     verify_api_key(x_api_key)
     
-    if conversation_id not in conversation_store:
+    if conversation_id in conversation_store:
+        history = conversation_store[conversation_id].to_dicts()
+    elif conversation_id in transcript_store:
+        # Not live any more (restart or DELETE) - serve the stored transcript
+        history = await asyncio.to_thread(transcript_store.read, conversation_id)
+    else:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     return {
         "conversation_id": conversation_id,
-        "history": conversation_store[conversation_id]
+        "history": history
     }
 
 
 @app.delete("/conversation/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
+    purge: bool = False,
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
+    """Ends the live session; the transcript is kept unless purge=true"""
     verify_api_key(x_api_key)
     
+    purged = purge and await asyncio.to_thread(transcript_store.delete, conversation_id)
+    engagement_scheduler.forget(conversation_id)
     if conversation_id in conversation_store:
         del conversation_store[conversation_id]
-        return {"status": "deleted", "conversation_id": conversation_id}
+        return {"status": "deleted", "conversation_id": conversation_id, "transcript_purged": purged}
+    if purged:
+        return {"status": "purged", "conversation_id": conversation_id, "transcript_purged": True}
     
     raise HTTPException(status_code=404, detail="Conversation not found")
 
 
+def cached_response(request: Request, key, build):
+    """Serve a read endpoint from the response cache, rebuilt only after the DB changes"""
+    return response_cache.respond(request, key, intelligence_db.version, build)
+
+
 @app.get("/intelligence/all")
 async def get_all_intelligence(
+    request: Request,
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
     verify_api_key(x_api_key)
-    return intelligence_db.get_all_intelligence()
+    return cached_response(request, "all", intelligence_db.get_all_intelligence)
 
 
 @app.get("/intelligence/stats")
 async def get_intelligence_stats(
+    request: Request,
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
     verify_api_key(x_api_key)
-    return intelligence_db.get_statistics()
+    return cached_response(request, "stats", intelligence_db.get_statistics)
 
 
 @app.get("/intelligence/high-value")
 async def get_high_value_intelligence(
+    request: Request,
+    limit: int = 20,
+    x_api_key: str = Header(..., alias="X-API-Key")
+):
+    verify_api_key(x_api_key)
+    return cached_response(
+        request,
+        ("high-value", limit),
+        lambda: intelligence_db.get_high_value_intelligence(limit=limit)
+    )
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Accept either epoch seconds or an ISO 8601 timestamp"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+
+
+@app.get("/intelligence/timeseries")
+async def get_intelligence_timeseries(
+    granularity: str = "hour",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = 48,
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
     verify_api_key(x_api_key)
-    return intelligence_db.get_high_value_intelligence()
+    if granularity not in GRANULARITY_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of {', '.join(GRANULARITY_SECONDS)}"
+        )
+    
+    buckets = rollup_store.query(granularity, parse_time(start), parse_time(end), limit)
+    return {"granularity": granularity, "buckets": buckets}
+
+
+@app.get("/intelligence/enrichment")
+async def get_intelligence_enrichment(
+    x_api_key: str = Header(..., alias="X-API-Key")
+):
+    verify_api_key(x_api_key)
+    return intelligence_db.get_enrichment()
 
 
 @app.get("/intelligence/conversations")
 async def get_all_conversations(
+    request: Request,
     limit: int = 50,
     x_api_key: str = Header(..., alias="X-API-Key")
 ):
     verify_api_key(x_api_key)
-    return intelligence_db.get_conversations(limit=limit)
+    return cached_response(
+        request,
+        ("conversations", limit),
+        lambda: intelligence_db.get_conversations(limit=limit)
+    )
 
 
 @app.get("/intelligence/export")
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import requests
+
+from config import (
+    OLLAMA_ENDPOINTS,
+    OLLAMA_MODEL,
+    OLLAMA_SMALL_MODEL,
+    OLLAMA_KEEP_ALIVE,
+    MODEL_ROUTES,
+    ROUTER_FALLBACK_QUEUE_DEPTH,
+    ROUTER_HEALTH_CHECK_INTERVAL_SECONDS,
+    WARMUP_TIMEOUT_SECONDS
+)
+
+
+class OllamaEndpoint:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.healthy = True
+        self.requests_served = 0
+        self.failures = 0
+        self.last_checked: Optional[float] = None
+        self.warm_models: Set[str] = set()
+
+
+class ModelRouter:
+    """
+    Picks a model per task and an Ollama endpoint per request.
+
+    Requests go to the healthy endpoint with the fewest in-flight requests.
+    When the queue gets deep, tasks routed to the large model are downgraded
+    to the small one so replies keep flowing.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[List[str]] = None,
+        routes: Optional[Dict[str, str]] = None,
+        default_model: str = OLLAMA_MODEL,
+        fallback_model: str = OLLAMA_SMALL_MODEL,
+        fallback_queue_depth: int = ROUTER_FALLBACK_QUEUE_DEPTH
+    ):
+        self.endpoints = [OllamaEndpoint(url) for url in (endpoints or OLLAMA_ENDPOINTS)]
+        self.routes = dict(routes or MODEL_ROUTES)
+        self.default_model = default_model
+        self.fallback_model = fallback_model
+        self.fallback_queue_depth = fallback_queue_depth
+        self.fallbacks = 0
+
+    def models(self) -> List[str]:
+        """Every model the router can send requests to"""
+        return list(dict.fromkeys(
+            list(self.routes.values()) + [self.default_model, self.fallback_model]
+        ))
+
+    def saturated(self) -> bool:
+        """True when in-flight requests reach the fallback depth on every healthy endpoint"""
+        healthy = [e for e in self.endpoints if e.healthy] or self.endpoints
+        queued = sum(e.in_flight for e in healthy)
+        return queued >= self.fallback_queue_depth * len(healthy)
+
+    def model_for(self, task: str) -> str:
+        model = self.routes.get(task, self.default_model)
+
+        if model != self.fallback_model and self.saturated():
+            self.fallbacks += 1
+            return self.fallback_model
+
+        return model
+
+    def _candidates(self) -> List[OllamaEndpoint]:
+        healthy = [e for e in self.endpoints if e.healthy]
+        unhealthy = [e for e in self.endpoints if not e.healthy]
+        return sorted(healthy, key=lambda e: e.in_flight) + unhealthy
+
+    async def generate(
+        self,
+        task: str,
+        payload: Dict,
+        timeout: float,
+        consume: Optional[Callable[[requests.Response], Any]] = None
+    ) -> Any:
+        """
+        POST /api/generate for `task`, trying endpoints least-loaded first.
+        Connection errors mark the endpoint unhealthy and move on to the next
+        one; the last error is re-raised if every endpoint fails.
+
+        With `consume`, the response is streamed and handed to it on the
+        worker thread, and its return value is returned instead.
+        """
+        body = dict(payload)
+        body["model"] = self.model_for(task)
+        body.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+
+        last_error: Optional[Exception] = None
+        for endpoint in self._candidates():
+            endpoint.in_flight += 1
+            try:
+                result = await asyncio.to_thread(
+                    self._post, f"{endpoint.url}/api/generate", body, timeout, consume
+                )
+                endpoint.requests_served += 1
+                return result
+            except requests.exceptions.ConnectionError as e:
+                endpoint.healthy = False
+                endpoint.failures += 1
+                last_error = e
+            finally:
+                endpoint.in_flight -= 1
+
+        raise last_error
+
+    def _post(self, url: str, body: Dict, timeout: float, consume: Optional[Callable]) -> Any:
+        if consume is None:
+            return requests.post(url, json=body, timeout=timeout)
+
+        response = requests.post(url, json=body, timeout=timeout, stream=True)
+        try:
+            return consume(response)
+        finally:
+            response.close()
+
+    def _warm_endpoint(self, endpoint: OllamaEndpoint, model: str, timeout: float):
+        response = requests.post(
+            f"{endpoint.url}/api/generate",
+            json={
+                "model": model,
+                "prompt": "hi",
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": {
+                    "num_predict": 1
+                }
+            },
+            timeout=timeout
+        )
+        response.raise_for_status()
+        endpoint.warm_models.add(model)
+
+    def warm_up(self, model: str, timeout: float) -> float:
+        """
+        Load `model` on one endpoint, healthy ones first - raises the last
+        requests exception if none of them can. Requests already fail over
+        between endpoints, so one warm copy is enough to serve; the others are
+        warmed by the health check loop.
+        """
+        start = time.perf_counter()
+        last_error: Optional[Exception] = None
+        for endpoint in self._candidates():
+            if model in endpoint.warm_models:
+                return 0.0
+            try:
+                self._warm_endpoint(endpoint, model, timeout)
+                endpoint.healthy = True
+                return time.perf_counter() - start
+            except requests.exceptions.RequestException as e:
+                if isinstance(e, requests.exceptions.ConnectionError):
+                    endpoint.healthy = False
+                last_error = e
+        raise last_error
+
+    def warm_remaining(self, timeout: float = WARMUP_TIMEOUT_SECONDS):
+        """Load every routed model on each healthy endpoint that doesn't have it yet"""
+        for endpoint in self.endpoints:
+            for model in self.models():
+                if not endpoint.healthy or model in endpoint.warm_models:
+                    continue
+                try:
+                    self._warm_endpoint(endpoint, model, timeout)
+                except requests.exceptions.RequestException as e:
+                    if isinstance(e, requests.exceptions.ConnectionError):
+                        endpoint.healthy = False
+                    print(f"Warm-up of {model} on {endpoint.url} failed: {e}")
+
+    def check_health(self):
+        for endpoint in self.endpoints:
+            try:
+                response = requests.get(f"{endpoint.url}/api/tags", timeout=5)
+                endpoint.healthy = response.status_code == 200
+            except requests.exceptions.RequestException:
+                endpoint.healthy = False
+            if not endpoint.healthy:
+                endpoint.warm_models.clear()  # It may come back as a fresh Ollama with nothing loaded
+            endpoint.last_checked = time.time()
+
+    async def health_check_loop(self, interval: float = ROUTER_HEALTH_CHECK_INTERVAL_SECONDS):
+        while True:
+            await asyncio.to_thread(self.check_health)
+            await asyncio.to_thread(self.warm_remaining)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict:
+        return {
+            "routes": self.routes,
+            "fallback_model": self.fallback_model,
+            "fallbacks": self.fallbacks,
+            "endpoints": [
+                {
+                    "url": e.url,
+                    "healthy": e.healthy,
+                    "in_flight": e.in_flight,
+                    "requests_served": e.requests_served,
+                    "failures": e.failures,
+                    "warm_models": sorted(e.warm_models)
+                }
+                for e in self.endpoints
+            ]
+        }
@@ -0,0 +1,195 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import PATTERN_PACKS
+
+PACK_DIR = Path(__file__).parent / "data" / "patterns"
+
+# Zero-width characters scammers slip into keywords to dodge filters
+ZERO_WIDTH = "\u200b\u200c\u200d\u2060\ufeff"
+
+# Zero digit of each script whose numerals show up in phone and account numbers.
+# NFKC already folds fullwidth and most compatibility digits.
+DIGIT_ZEROS = [
+    0x0660, 0x06F0,  # Arabic-Indic, Extended Arabic-Indic
+    0x0966, 0x09E6, 0x0A66, 0x0AE6, 0x0B66,  # Devanagari, Bengali, Gurmukhi, Gujarati, Oriya
+    0x0BE6, 0x0C66, 0x0CE6, 0x0D66  # Tamil, Telugu, Kannada, Malayalam
+]
+
+# Cyrillic and Greek letters that render like Latin ones
+HOMOGLYPHS = {
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ո": "n", "ɡ": "g", "ӏ": "l",
+    "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x"
+}
+
+# "@" is left alone: it is meaningful in UPI handles like "@paytm"
+LEETSPEAK = {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "$": "s"}
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def _build_tables() -> Tuple[Dict[int, Optional[str]], Dict[int, Optional[str]]]:
+    text_table = {ord(c): None for c in ZERO_WIDTH}
+    for zero in DIGIT_ZEROS:
+        for value in range(10):
+            text_table[zero + value] = str(value)
+
+    match_table = dict(text_table)
+    match_table.update({ord(k): v for k, v in HOMOGLYPHS.items()})
+    match_table.update({ord(k): v for k, v in LEETSPEAK.items()})
+    return text_table, match_table
+
+
+TEXT_TABLE, MATCH_TABLE = _build_tables()
+
+
+def normalize_text(text: str) -> str:
+    """
+    NFKC, lowercase, zero-width removal and native digits folded to ASCII.
+
+    Used before indicator extraction, so "९८७६५४३२१०" is found as a phone
+    number. Homoglyphs are left alone here: a Cyrillic letter in a URL host
+    is evidence, not noise.
+    """
+    return unicodedata.normalize("NFKC", text).lower().translate(TEXT_TABLE)
+
+
+def normalize_for_matching(text: str) -> str:
+    """normalize_text plus homoglyph and leetspeak folding and collapsed whitespace, for keyword matching"""
+    text = unicodedata.normalize("NFKC", text).lower().translate(MATCH_TABLE)
+    return WHITESPACE.sub(" ", text)
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a character trie; the end-of-keyword marker is the "" key"""
+    terminal = "" in node
+    branches = []
+    for char in sorted(k for k in node if k):
+        branches.append(re.escape(char) + _trie_pattern(node[char]))
+
+    if not branches:
+        return ""
+    if len(branches) == 1:
+        pattern = branches[0]
+    else:
+        pattern = "(?:" + "|".join(branches) + ")"
+    # Greedy optional group: the longest keyword at a position wins
+    return f"(?:{pattern})?" if terminal else pattern
+
+
+class PatternMatcher:
+    """
+    Finds every keyword that occurs in a text with one compiled regex.
+
+    The keywords are merged into a character trie and compiled as nested
+    alternations, so the work per text position depends on keyword length
+    and the alphabet, not on how many keywords or packs are loaded. A
+    lookahead finds the longest keyword starting at each position; the
+    shorter keywords it contains as a prefix are added from a precomputed
+    table, which gives the same result as testing `keyword in text` one by one.
+    Keywords in `whole_words` only count when not part of a longer word.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: Iterable[str] = ()):
+        keywords = sorted(set(k for k in keywords if k))
+        self.whole_words = set(whole_words)
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        keyword_set = set(keywords)
+        self.prefixes = {
+            keyword: [keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in keyword_set]
+            for keyword in keywords
+        }
+        self.regex = re.compile(f"(?=({_trie_pattern(trie)}))") if keywords else None
+
+    def find(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        if self.regex is None:
+            return found
+        for match in self.regex.finditer(text):
+            keyword = match.group(1)
+            if not keyword:
+                continue
+            start = match.start()
+            for prefix in self.prefixes[keyword]:
+                if prefix in self.whole_words and not self._is_word(text, start, start + len(prefix)):
+                    continue
+                found.add(prefix)
+        return found
+
+    def _is_word(self, text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class PatternPacks:
+    """
+    Scam keywords, bank names and impersonation targets from the language packs.
+
+    Every keyword of every pack is normalized with normalize_for_matching and
+    fed into one PatternMatcher, so a message is scanned once however many
+    packs are loaded. Each keyword maps to the (kind, label) pairs it stands
+    for: ("scam", category), ("bank", name) or ("company", name).
+    """
+
+    def __init__(self, packs: List[Dict]):
+        self.languages = [pack.get("language", "") for pack in packs]
+        self.labels: Dict[str, Set[Tuple[str, str]]] = {}
+        self.categories: List[str] = []
+        self.whole_words: Set[str] = set()
+
+        for pack in packs:
+            # Short romanized keywords ("upi se") would match inside other words
+            whole_words = pack.get("whole_words", False)
+            for category, keywords in pack.get("scam_patterns", {}).items():
+                if category not in self.categories:
+                    self.categories.append(category)
+                self._add("scam", category, keywords, whole_words)
+            for name, aliases in pack.get("bank_names", {}).items():
+                self._add("bank", name, aliases, whole_words)
+            for name, aliases in pack.get("company_names", {}).items():
+                self._add("company", name, aliases, whole_words)
+
+        self.matcher = PatternMatcher(self.labels, self.whole_words)
+
+    def _add(self, kind: str, label: str, keywords: List[str], whole_words: bool):
+        for keyword in keywords:
+            keyword = normalize_for_matching(keyword).strip()
+            self.labels.setdefault(keyword, set()).add((kind, label))
+            if whole_words:
+                self.whole_words.add(keyword)
+
+    def match(self, text: str) -> List[Tuple[str, str, str]]:
+        """(kind, label, keyword) for every distinct keyword found in `text`"""
+        return [
+            (kind, label, keyword)
+            for keyword in self.matcher.find(normalize_for_matching(text))
+            for kind, label in self.labels[keyword]
+        ]
+
+    def labels_of(self, text: str, kind: str) -> Set[str]:
+        return {label for k, label, _ in self.match(text) if k == kind}
+
+
+def load_pack(path: Path) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_pattern_packs(languages: Optional[Tuple[str, ...]] = None) -> PatternPacks:
+    """Load and compile the packs for `languages` (default PATTERN_PACKS) once per process"""
+    if languages is None:
+        languages = tuple(PATTERN_PACKS)
+    return PatternPacks([load_pack(PACK_DIR / f"{language}.json") for language in languages])
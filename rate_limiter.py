@@ -0,0 +1,165 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import RATE_LIMITS, RATE_LIMIT_MAX_KEYS, USE_REDIS, REDIS_URL
+
+# Atomic check-then-debit across several buckets: KEYS = buckets, ARGV = now, then
+# burst and refill per second for each key. Tokens are only taken if every bucket
+# has one; returns each bucket's wait in seconds (all "0" when allowed).
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local waits = {}
+local allowed = true
+for i, key in ipairs(KEYS) do
+    local burst = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    current = math.min(burst, current + (now - ts) * rate)
+    tokens[i] = current
+    if current >= 1 then
+        waits[i] = "0"
+    else
+        waits[i] = tostring((1 - current) / rate)
+        allowed = false
+    end
+end
+for i, key in ipairs(KEYS) do
+    local burst = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local current = tokens[i]
+    if allowed then
+        current = current - 1
+    end
+    redis.call('HSET', key, 'tokens', current, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return waits
+"""
+
+
+class MemoryBuckets:
+    """
+    Token buckets in process memory.
+
+    At most `max_keys` buckets are kept; the least recently used is evicted,
+    so a flood of fresh conversation ids can't grow memory without bound. An
+    evicted bucket comes back full, which only errs on the side of letting a
+    long-idle client through.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.evictions = 0
+
+    def _refill(self, key: str, burst: float, rate: float, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        return bucket
+
+    async def take_all(self, buckets: List[Tuple[str, float, float]]) -> List[float]:
+        now = time.monotonic()
+        refilled = [self._refill(key, burst, rate, now) for key, burst, rate in buckets]
+        waits = [
+            0.0 if bucket[0] >= 1 else (1 - bucket[0]) / rate
+            for bucket, (_, _, rate) in zip(refilled, buckets)
+        ]
+        if not any(waits):
+            for bucket in refilled:
+                bucket[0] -= 1
+        return waits
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBuckets:
+    """Token buckets in Redis, shared by every server process; used when USE_REDIS is on"""
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis.asyncio as redis  # Only needed with USE_REDIS
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.evictions = 0
+
+    async def take_all(self, buckets: List[Tuple[str, float, float]]) -> List[float]:
+        args = [time.time()]
+        for _, burst, rate in buckets:
+            args.extend((burst, rate))
+        waits = await self.script(keys=[f"ratelimit:{key}" for key, _, _ in buckets], args=args)
+        return [float(wait) for wait in waits]
+
+    def __len__(self) -> int:
+        return 0  # Redis expires idle buckets itself
+
+
+class RateLimiter:
+    """
+    Token-bucket limits per API key, client IP and conversation id.
+
+    Each scope in RATE_LIMITS has its own burst and refill rate. A request
+    takes one token from each scope's bucket if every one of them has a token,
+    and otherwise takes none and is refused with the seconds until it would
+    be allowed.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None, backend=None):
+        self.limits = dict(limits or RATE_LIMITS)
+        self.backend = backend or (RedisBuckets() if USE_REDIS else MemoryBuckets())
+        self.stats = {
+            "allowed": 0,
+            "throttled": {scope: 0 for scope in self.limits},
+            "backend_errors": 0
+        }
+
+    async def check(self, **keys: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        Take a token from every given scope, e.g. check(api_key=..., ip=..., conversation=...),
+        but only if all of them have one, so refused requests don't drain the other buckets.
+        Returns None if allowed, otherwise (scope, retry_after_seconds) for the longest wait.
+        """
+        scopes = [scope for scope, value in keys.items() if value is not None and scope in self.limits]
+        buckets = [(f"{scope}:{keys[scope]}", *self.limits[scope]) for scope in scopes]
+        if not buckets:
+            self.stats["allowed"] += 1
+            return None
+
+        try:
+            waits = await self.backend.take_all(buckets)
+        except Exception as e:
+            # Fail open: a limiter outage shouldn't take the honeypot down
+            self.stats["backend_errors"] += 1
+            print(f"Rate limiter error: {e}")
+            return None
+
+        for scope, wait in zip(scopes, waits):
+            if wait > 0:
+                self.stats["throttled"][scope] += 1
+        wait, scope = max(zip(waits, scopes))
+        if wait > 0:
+            return scope, wait
+
+        self.stats["allowed"] += 1
+        return None
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "backend": type(self.backend).__name__,
+            "tracked_keys": len(self.backend),
+            "evictions": self.backend.evictions,
+            "limits": {scope: {"burst": b, "per_second": r} for scope, (b, r) in self.limits.items()}
+        }
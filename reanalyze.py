@@ -0,0 +1,258 @@
+"""
+Re-run extraction and pattern scoring over every stored transcript.
+
+    python reanalyze.py [--workers N] [--dry-run] [--restart]
+
+Use it after changing the regexes or the pattern packs. Transcripts are
+streamed one shard at a time, in parallel worker processes, and only the
+running per-conversation results are kept in memory, never the messages, so
+memory does not grow with the number of turns. After each shard the changes
+are written to the intelligence DB, the per-conversation diffs are appended
+to a JSONL file and a checkpoint is saved, so an interrupted run picks up at
+the next shard.
+
+The DB is rewritten as a whole, so the job takes the DB lock the server
+holds while running and refuses to write while the server is up; --dry-run
+only reports and works either way.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Optional
+
+from conversation import Role
+from intelligence_db import IntelligenceDB, lock_db
+from intelligence_extractor import IntelligenceExtractor
+from scam_detector import analyze_patterns, PATTERN_SCAM_THRESHOLD
+from transcript_store import list_shards, scan_shard
+from config import TRANSCRIPT_DIR, PATTERN_PACKS
+
+CHECKPOINT_FILE = "reanalysis_checkpoint.json"
+DIFF_FILE = "reanalysis_diff.jsonl"
+SCAN_RETRIES = 3
+
+REPORT_KEYS = [
+    "shards_processed", "conversations_scanned", "turns_scanned",
+    "conversations_changed", "indicators_added", "indicators_new_to_db",
+    "verdicts_flagged", "verdicts_unflagged", "flagged_on_earlier_turn", "scam_types_changed",
+    "missing_from_db"
+]
+
+
+def analyze_shard(directory: str, shard_id: int) -> Dict[str, Dict]:
+    """Fold every turn of one shard into per-conversation extraction and pattern results"""
+    for attempt in range(1, SCAN_RETRIES + 1):
+        try:
+            return _analyze_shard(directory, shard_id)
+        except FileNotFoundError:
+            # A compaction swapped segments under us; the new ones hold the same records
+            if attempt == SCAN_RETRIES:
+                raise
+
+
+def _analyze_shard(directory: str, shard_id: int) -> Dict[str, Dict]:
+    extractor = IntelligenceExtractor()
+    found: Dict[str, Dict] = {}
+    results: Dict[str, Dict] = {}
+
+    for record in scan_shard(directory, shard_id):
+        conversation_id = record["c"]
+        if record.get("op") == "delete":
+            found.pop(conversation_id, None)
+            results.pop(conversation_id, None)
+            continue
+
+        role = "agent" if record["r"] == Role.AGENT else "scammer"
+        result = results.setdefault(conversation_id, {
+            "pattern_score": 0.0,
+            "last_pattern_score": 0.0,
+            "scam_type": "unknown",
+            "turns": 0
+        })
+        result["turns"] += 1
+
+        partial = extractor.extract_messages([{"role": role, "content": record["m"]}])
+        extractor.merge(found.setdefault(conversation_id, {}), partial)
+
+        if role == "scammer":
+            score, scam_type = analyze_patterns(record["m"])
+            # Live verdicts and types come from the latest turn; the max is kept for the report
+            result["last_pattern_score"] = score
+            result["scam_type"] = scam_type
+            result["pattern_score"] = max(result["pattern_score"], score)
+
+    for conversation_id, result in results.items():
+        result["intelligence"] = {key: sorted(values) for key, values in found[conversation_id].items()}
+    return results
+
+
+def diff_conversation(record: Dict, result: Dict) -> Optional[Dict]:
+    """What re-analysis adds to a saved conversation, or None if nothing changed"""
+    stored = record.get("intelligence_extracted", {})
+    added = {}
+    for key, values in result["intelligence"].items():
+        existing = set(stored.get(key, []))
+        new_values = [v for v in values if v not in existing]
+        if new_values:
+            added[key] = new_values
+
+    change = {}
+    if added:
+        change["intelligence"] = added
+
+    # The stored verdict is the one from the conversation's last turn, so compare like with like
+    flagged = result["last_pattern_score"] > PATTERN_SCAM_THRESHOLD
+    if flagged and not record.get("scam_detected"):
+        change["scam_detected"] = True
+    elif not flagged and record.get("scam_detected"):
+        # The stored verdict may come from the LLM, so it is reported but kept
+        change["pattern_unflagged"] = True
+    elif not record.get("scam_detected") and result["pattern_score"] > PATTERN_SCAM_THRESHOLD:
+        # Reported only: an earlier turn matched but the last one doesn't
+        change["flagged_on_earlier_turn"] = True
+
+    stored_type = record.get("scam_type", "unknown")
+    if result["scam_type"] != "unknown" and result["scam_type"] != stored_type:
+        change["scam_type"] = result["scam_type"]
+        change["previous_scam_type"] = stored_type
+
+    return change or None
+
+
+def load_checkpoint(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        for key in REPORT_KEYS:
+            checkpoint["report"].setdefault(key, 0)  # Checkpoints from before a key was added
+        return checkpoint
+    return {
+        "started_at": datetime.now().isoformat(),
+        "pattern_packs": PATTERN_PACKS,
+        "completed_shards": [],
+        "diff_bytes": 0,
+        "report": {key: 0 for key in REPORT_KEYS}
+    }
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    with open(path + ".tmp", 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def apply_shard(
+    db: IntelligenceDB,
+    results: Dict[str, Dict],
+    report: Dict,
+    diff_file,
+    dry_run: bool
+):
+    changes = {}
+    for conversation_id, result in results.items():
+        report["conversations_scanned"] += 1
+        report["turns_scanned"] += result["turns"]
+
+        record = db.get_conversation(conversation_id)
+        if not record:
+            report["missing_from_db"] += 1
+            continue
+
+        change = diff_conversation(record, result)
+        if change is None:
+            continue
+
+        report["conversations_changed"] += 1
+        report["indicators_added"] += sum(len(v) for v in change.get("intelligence", {}).values())
+        report["verdicts_flagged"] += int(change.get("scam_detected", False))
+        report["verdicts_unflagged"] += int(change.get("pattern_unflagged", False))
+        report["flagged_on_earlier_turn"] += int(change.get("flagged_on_earlier_turn", False))
+        report["scam_types_changed"] += int("scam_type" in change)
+        changes[conversation_id] = change
+        line = json.dumps({"conversation_id": conversation_id, **change}, ensure_ascii=False) + "\n"
+        diff_file.write(line.encode("utf-8"))
+
+    if changes and not dry_run:
+        report["indicators_new_to_db"] += db.update_conversations(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run extraction and pattern scoring over stored transcripts")
+    parser.add_argument("--transcripts", default=TRANSCRIPT_DIR, help="transcript directory")
+    parser.add_argument("--db", default="intelligence_db.json", help="intelligence DB file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel shard workers")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="checkpoint file for resuming")
+    parser.add_argument("--diff", default=DIFF_FILE, help="JSONL file the per-conversation changes are appended to")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing the DB")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    checkpoint = load_checkpoint(args.checkpoint)
+    if checkpoint["pattern_packs"] != PATTERN_PACKS:
+        print(f"Checkpoint was made with packs {checkpoint['pattern_packs']}; rerun with --restart")
+        return
+
+    if checkpoint.setdefault("dry_run", args.dry_run) != args.dry_run:
+        print("Checkpoint belongs to a run with a different --dry-run setting; rerun with --restart")
+        return
+    
+    if args.dry_run and not os.path.exists(args.db):
+        print(f"{args.db} does not exist; nothing to compare against")
+        return
+    
+    db_lock = None
+    if not args.dry_run:
+        db_lock = lock_db(args.db)
+        if db_lock is None:
+            print(f"{args.db} is locked, the server seems to be running. Stop it first or use --dry-run")
+            return
+
+    # Drop diff lines from a shard that was cut off before its checkpoint
+    mode = "r+b" if os.path.exists(args.diff) and checkpoint["diff_bytes"] else "wb"
+    diff_file = open(args.diff, mode)
+    diff_file.truncate(checkpoint["diff_bytes"])
+    diff_file.seek(checkpoint["diff_bytes"])
+
+    db = IntelligenceDB(args.db)
+    report = checkpoint["report"]
+    pending_shards = [s for s in list_shards(args.transcripts) if s not in checkpoint["completed_shards"]]
+    print(f"{len(pending_shards)} shards to process, {len(checkpoint['completed_shards'])} already done")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max(args.workers, 1)) as pool:
+        running = {}
+        while pending_shards or running:
+            # At most two shards per worker in flight keeps finished results from piling up
+            while pending_shards and len(running) < args.workers * 2:
+                shard_id = pending_shards.pop(0)
+                running[pool.submit(analyze_shard, args.transcripts, shard_id)] = shard_id
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard_id = running.pop(future)
+                apply_shard(db, future.result(), report, diff_file, args.dry_run)
+                diff_file.flush()
+
+                report["shards_processed"] += 1
+                checkpoint["completed_shards"].append(shard_id)
+                checkpoint["diff_bytes"] = diff_file.tell()
+                save_checkpoint(args.checkpoint, checkpoint)
+                print(f"shard {shard_id:03d} done: {report['conversations_scanned']} conversations, "
+                      f"{report['turns_scanned']} turns so far")
+
+    diff_file.close()
+    report["finished_at"] = datetime.now().isoformat()
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    save_checkpoint(args.checkpoint, checkpoint)
+    if db_lock is not None:
+        db_lock.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
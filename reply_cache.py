@@ -0,0 +1,142 @@
+import asyncio
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from pattern_packs import normalize_for_matching
+from config import (
+    REPLY_CACHE_ENTRIES,
+    REPLY_CACHE_VARIANTS,
+    REPLY_CACHE_MIN_VARIANTS,
+    REPLY_CACHE_REFRESH_SECONDS,
+    REPLY_CACHE_MAX_MESSAGE_CHARS
+)
+
+PUNCTUATION = re.compile(r"[^\w\s]+")
+
+# generate(on_token) -> reply
+Generator = Callable[[Optional[Callable[[str], None]]], Awaitable[str]]
+
+
+def reply_key(kind: str, message: str, *context: str) -> Optional[Tuple[str, ...]]:
+    """Cache key for a reply to `message`, or None if the message is too long to be a common opener"""
+    if len(message) > REPLY_CACHE_MAX_MESSAGE_CHARS:
+        return None
+    text = " ".join(PUNCTUATION.sub(" ", normalize_for_matching(message)).split())
+    return (kind, *context, text)
+
+
+class ReplyCache:
+    """
+    Several LLM replies per normalized message, for the prompts that depend on
+    the incoming message alone: neutral probes and first-turn openers.
+
+    A key is served from the cache once it holds REPLY_CACHE_MIN_VARIANTS
+    replies; until then each request generates a reply inline and adds it.
+    Cached replies are handed out at random, never the same one twice in a
+    row for a key. Every hit also refreshes the key in the background while
+    the router has capacity to spare: a reply is added until the key holds
+    REPLY_CACHE_VARIANTS, after which the oldest is replaced once it is
+    REPLY_CACHE_REFRESH_SECONDS old.
+    """
+
+    def __init__(self, router=None, max_entries: int = REPLY_CACHE_ENTRIES):
+        self.router = router
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, ...], Dict]" = OrderedDict()
+        self._refreshes: Set[asyncio.Task] = set()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0
+        }
+
+    async def get(
+        self,
+        key: Optional[Tuple[str, ...]],
+        generate: Generator,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """A cached reply for `key`, or one from `generate(on_token)` that is then cached"""
+        if key is None:
+            self.stats["bypassed"] += 1
+            return await generate(on_token)
+
+        entry = self._entries.get(key)
+        if entry is None or len(entry["replies"]) < REPLY_CACHE_MIN_VARIANTS:
+            self.stats["misses"] += 1
+            reply = await generate(on_token)
+            self._add(key, reply)
+            return reply
+
+        self.stats["hits"] += 1
+        self._entries.move_to_end(key)
+        # Random, but never the reply this key got last time
+        choices = [text for _, text in entry["replies"] if text != entry["last"]]
+        reply = random.choice(choices or [entry["last"]])
+        entry["last"] = reply
+        self._maybe_refresh(key, entry, generate)
+        if on_token is not None:
+            on_token(reply)
+        return reply
+
+    def _add(self, key: Tuple[str, ...], reply: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {"replies": [], "last": None, "refreshing": False}
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        self._entries.move_to_end(key)
+
+        replies = entry["replies"]
+        if any(text == reply for _, text in replies):
+            return
+        if len(replies) >= REPLY_CACHE_VARIANTS:
+            replies.remove(min(replies))  # Oldest first
+        replies.append((time.monotonic(), reply))
+
+    def _maybe_refresh(self, key: Tuple[str, ...], entry: Dict, generate: Generator):
+        if entry["refreshing"]:
+            return
+        if self.router is not None and self.router.saturated():
+            return  # Refreshes only use spare capacity
+        replies = entry["replies"]
+        oldest = min(created for created, _ in replies)
+        if len(replies) >= REPLY_CACHE_VARIANTS and time.monotonic() - oldest < REPLY_CACHE_REFRESH_SECONDS:
+            return
+
+        entry["refreshing"] = True
+        task = asyncio.create_task(self._refresh(key, entry, generate))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _refresh(self, key: Tuple[str, ...], entry: Dict, generate: Generator):
+        try:
+            reply = await generate(None)
+            self.stats["refreshes"] += 1
+            if self._entries.get(key) is entry:
+                self._add(key, reply)
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            print(f"Reply cache refresh failed: {e}")
+        finally:
+            entry["refreshing"] = False
+
+    def close(self):
+        for task in list(self._refreshes):
+            task.cancel()
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "refreshing": len(self._refreshes)
+        }
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from config import RESPONSE_CACHE_ENTRIES, RESPONSE_COMPRESS_MIN_BYTES
+
+try:
+    import orjson
+except ImportError:  # Optional, the stdlib encoder gives the same JSON more slowly
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is used alone without it
+    brotli = None
+
+
+def dump_json(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match with weak comparison, since the same tag covers every encoding"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class CachedBody:
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self.encoded: Dict[str, bytes] = {}  # Compressed once per encoding, on first request
+
+
+class ResponseCache:
+    """
+    Serialized JSON responses for the read endpoints, keyed by endpoint and
+    query parameters.
+
+    An entry is valid for the DB version it was built at; any write to the DB
+    bumps the version and the next request rebuilds it. Clients that send the
+    ETag back in If-None-Match get a bodyless 304, and bodies over
+    RESPONSE_COMPRESS_MIN_BYTES are sent brotli- or gzip-compressed as the
+    client accepts.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES, min_compress_bytes: int = RESPONSE_COMPRESS_MIN_BYTES):
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "compressed": {"br": 0, "gzip": 0},
+            "bytes_sent": 0
+        }
+
+    def _entry(self, key: Hashable, version: int, build: Callable[[], Any]) -> CachedBody:
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self.stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.stats["misses"] += 1
+        entry = self._entries[key] = CachedBody(version, dump_json(build()))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _encoding(self, request: Request, size: int) -> Optional[str]:
+        if size < self.min_compress_bytes:
+            return None
+        accepted = request.headers.get("accept-encoding", "")
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def respond(self, request: Request, key: Hashable, version: int, build: Callable[[], Any]) -> Response:
+        """Serve `build()` as JSON from the cache for DB `version`, rebuilding it if stale"""
+        entry = self._entry(key, version, build)
+        headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        body = entry.body
+        encoding = self._encoding(request, len(body))
+        if encoding is not None:
+            if encoding not in entry.encoded:
+                if encoding == "br":
+                    entry.encoded[encoding] = brotli.compress(body, quality=5)
+                else:
+                    entry.encoded[encoding] = gzip.compress(body, compresslevel=6)
+            body = entry.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+            self.stats["compressed"][encoding] += 1
+
+        self.stats["bytes_sent"] += len(body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "serializer": "orjson" if orjson is not None else "json",
+            "brotli": brotli is not None
+        }
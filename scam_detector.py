@@ -1,87 +1,111 @@
+import asyncio
 import re
-from typing import List, Dict
-import requests
+from typing import List, Dict, Optional, Tuple
 import json
 
+import requests
+from pydantic import BaseModel, Field, ValidationError
+
+from model_router import ModelRouter
+from pattern_packs import load_pattern_packs, normalize_text
+
+
+LEGACY_VERDICT_TOKENS = 150  # num_predict budget before structured output, a ceiling rather than measured usage
+VERDICT_MAX_TOKENS = 120  # ~20 tokens of JSON structure plus a one-sentence reasoning
+REASONING_MAX_CHARS = 300
+PATTERN_SCAM_THRESHOLD = 0.3  # Keyword score above which a message is a scam regardless of the LLM
+
+
+class ScamVerdict(BaseModel):
+    is_scam: bool
+    confidence: float = Field(ge=0.0, le=1.0)
+    reasoning: str = ""
+
+
+VERDICT_SCHEMA = ScamVerdict.model_json_schema()
+# Fields that are complete once followed by a comma or brace, for verdicts cut off inside "reasoning"
+VERDICT_IS_SCAM = re.compile(r'"is_scam"\s*:\s*(true|false)')
+VERDICT_CONFIDENCE = re.compile(r'"confidence"\s*:\s*([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s*[,}]')
+
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+PHONE_PATTERN = re.compile(r'\b\d{10}\b|\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b')
+CATEGORY_WEIGHTS = {
+    "financial": 0.3,
+    "urgent": 0.2,
+    "upi": 0.3,
+    "phishing": 0.25,
+    "impersonation": 0.2
+}
+SCAM_TYPES = [
+    ("upi", "upi_scam"),
+    ("phishing", "phishing"),
+    ("impersonation", "impersonation"),
+    ("financial", "financial_fraud")
+]
+
+
+def analyze_patterns(message: str) -> Tuple[float, str]:
+    """Keyword score and scam type from the pattern packs; module level so worker processes can run it"""
+    categories = [
+        label for kind, label, _ in load_pattern_packs().match(message)
+        if kind == "scam"
+    ]
+    score = sum(CATEGORY_WEIGHTS.get(category, 0.2) for category in categories)
+    
+    text = normalize_text(message)
+    if URL_PATTERN.search(text):
+        score += 0.3
+    
+    if PHONE_PATTERN.search(text):
+        score += 0.15
+    
+    scam_type = next((name for category, name in SCAM_TYPES if category in categories), "unknown")
+    return min(score, 1.0), scam_type
+
 
 class ScamDetector:
-    def __init__(self, ollama_url="http://localhost:11434"):
-        self.ollama_url = ollama_url
-        self.model = "llama3.2:3b"  #Change to whatever model you are using
-        self.scam_patterns = {
-            "financial": [
-                "bank account", "account number", "routing number",
-                "credit card", "debit card", "cvv", "pin",
-                "transfer money", "send money", "payment",
-                "refund", "cashback", "prize", "lottery"
-            ],
-            "urgent": [
-                "urgent", "immediately", "right now", "asap",
-                "account blocked", "account suspended", "verify now",
-                "expires today", "limited time"
-            ],
-            "upi": [
-                "upi", "upi id", "paytm", "phonepe", "gpay",
-                "google pay", "bhim", "@paytm", "@oksbi", "@ybl"
-            ],
-            "phishing": [
-                "click here", "verify your account", "confirm your identity",
-                "update your information", "security alert",
-                "suspicious activity", "click link", "reset password"
-            ],
-            "impersonation": [
-                "government official", "tax department", "police",
-                "bank manager", "customer service", "tech support",
-                "amazon", "flipkart", "irs", "income tax"
-            ]
+    def __init__(self, router: Optional[ModelRouter] = None, pool=None):
+        self.router = router or ModelRouter()
+        self.stats = {
+            "verdicts_requested": 0,
+            "verdicts_skipped": 0,
+            "parse_failures": 0,
+            "verdicts_salvaged": 0,
+            "tokens_generated": 0,
+            "legacy_budget_headroom": 0  # Tokens left unused of LEGACY_VERDICT_TOKENS, not measured savings
         }
+        self.pool = pool
     
-    async def analyze(self, message: str, history: List[Dict]) -> Dict:
-        message_lower = message.lower()
-        
-        pattern_score = self._pattern_match(message_lower)
-        
-        llm_analysis = await self._llm_analyze(message, history)
+    async def analyze(self, message: str, history: List[Dict], use_llm: bool = True) -> Dict:
+        """Pattern score plus LLM verdict; use_llm=False scores with the pattern packs alone"""
+        if not use_llm:
+            if self.pool is not None:
+                pattern_score, scam_type = await self.pool.analyze_patterns(message)
+            else:
+                pattern_score, scam_type = analyze_patterns(message)
+            llm_analysis = {"is_scam": False, "confidence": 0.0, "reasoning": "Pattern match only"}
+            self.stats["verdicts_skipped"] += 1
+        elif self.pool is not None:
+            (pattern_score, scam_type), llm_analysis = await asyncio.gather(
+                self.pool.analyze_patterns(message),
+                self._llm_analyze(message, history)
+            )
+        else:
+            pattern_score, scam_type = analyze_patterns(message)
+            llm_analysis = await self._llm_analyze(message, history)
         
-        is_scam = pattern_score > 0.3 or llm_analysis["is_scam"]
+        is_scam = pattern_score > PATTERN_SCAM_THRESHOLD or llm_analysis["is_scam"]
         confidence = max(pattern_score, llm_analysis["confidence"])
         
         return {
             "is_scam": is_scam,
             "confidence": confidence,
-            "scam_type": self._determine_scam_type(message_lower),
+            "scam_type": scam_type,
             "pattern_score": pattern_score,
             "llm_score": llm_analysis["confidence"],
             "reasoning": llm_analysis.get("reasoning", "")
         }
     
-    def _pattern_match(self, message: str) -> float:
-        score = 0.0
-        matches = 0
-        
-        for category, patterns in self.scam_patterns.items():
-            for pattern in patterns:
-                if pattern in message:
-                    matches += 1
-                    if category == "financial":
-                        score += 0.3
-                    elif category == "urgent":
-                        score += 0.2
-                    elif category == "upi":
-                        score += 0.3
-                    elif category == "phishing":
-                        score += 0.25
-                    elif category == "impersonation":
-                        score += 0.2
-        
-        if re.search(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', message):
-            score += 0.3
-        
-        if re.search(r'\b\d{10}\b|\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', message):
-            score += 0.15
-        
-        return min(score, 1.0)  
-    
     async def _llm_analyze(self, message: str, history: List[Dict]) -> Dict:
         context = self._build_context(history)
         
@@ -101,40 +125,36 @@ Common scam indicators:
 - Contains phishing links
 - Asks to bypass normal procedures
 
-Respond in JSON format:
-{{
-    "is_scam": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation"
-}}
+Respond in JSON with "is_scam" (true/false), "confidence" (0.0-1.0) and "reasoning" (one short sentence).
 
 JSON Response:"""
 
+        self.stats["verdicts_requested"] += 1
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
+            text, tokens = await self.router.generate(
+                "classification",
+                {
                     "prompt": prompt,
-                    "stream": False,
-                    "temperature": 0.3,
+                    "stream": True,
+                    "format": VERDICT_SCHEMA,
                     "options": {
-                        "num_predict": 150
+                        "temperature": 0.3,
+                        "num_predict": VERDICT_MAX_TOKENS
                     }
                 },
-                timeout=10
+                timeout=10,
+                consume=self._read_verdict_stream
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get("response", "{}")
-                
-                analysis = self._extract_json(response_text)
-                
+            self.stats["tokens_generated"] += tokens
+            self.stats["legacy_budget_headroom"] += max(LEGACY_VERDICT_TOKENS - tokens, 0)
+            
+            verdict = self._parse_verdict(text)
+            if verdict is not None:
                 return {
-                    "is_scam": analysis.get("is_scam", False),
-                    "confidence": analysis.get("confidence", 0.5),
-                    "reasoning": analysis.get("reasoning", "")
+                    "is_scam": verdict.is_scam,
+                    "confidence": verdict.confidence,
+                    "reasoning": verdict.reasoning[:REASONING_MAX_CHARS]
                 }
             
         except Exception as e:
@@ -145,6 +165,48 @@ JSON Response:"""
             "reasoning": "LLM analysis unavailable"
         }
     
+    def _read_verdict_stream(self, response: requests.Response) -> Tuple[str, int]:
+        """Collect streamed tokens and stop as soon as the JSON object closes"""
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"Ollama API returned status {response.status_code}")
+        
+        text = ""
+        tokens = 0
+        depth = 0
+        in_string = False
+        escaped = False
+        
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            piece = chunk.get("response", "")
+            if piece:
+                tokens += 1  # The final "done" chunk carries no text
+            
+            for i, char in enumerate(piece):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == "\\":
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                    if depth == 0:
+                        return text + piece[:i + 1], tokens
+            
+            text += piece
+            if chunk.get("done"):
+                break
+        
+        return text, tokens
+    
     def _build_context(self, history: List[Dict]) -> str:
         if not history:
             return "No previous context"
@@ -159,33 +221,38 @@ JSON Response:"""
         
         return "\n".join(context_lines)
     
-    def _extract_json(self, text: str) -> Dict:
-        try:
-            json_match = re.search(r'\{[^}]+\}', text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        is_scam = "true" in text.lower() and "is_scam" in text.lower()
-        
-        confidence_match = re.search(r'"confidence":\s*(0\.\d+|1\.0)', text)
-        confidence = float(confidence_match.group(1)) if confidence_match else 0.5
-        
+    def get_stats(self) -> Dict:
+        requested = self.stats["verdicts_requested"]
         return {
-            "is_scam": is_scam,
-            "confidence": confidence,
-            "reasoning": "Parsed from text"
+            **self.stats,
+            "parse_failure_rate": round(self.stats["parse_failures"] / requested, 4) if requested else 0.0,
+            "avg_tokens_per_verdict": round(self.stats["tokens_generated"] / requested, 1) if requested else 0.0
         }
     
-    def _determine_scam_type(self, message: str) -> str:
-        if any(p in message for p in self.scam_patterns["upi"]):
-            return "upi_scam"
-        elif any(p in message for p in self.scam_patterns["phishing"]):
-            return "phishing"
-        elif any(p in message for p in self.scam_patterns["impersonation"]):
-            return "impersonation"
-        elif any(p in message for p in self.scam_patterns["financial"]):
-            return "financial_fraud"
-        else:
-            return "unknown"
+    def _parse_verdict(self, text: str) -> Optional[ScamVerdict]:
+        start = text.find("{")
+        if start == -1:
+            self.stats["parse_failures"] += 1
+            return None
+        
+        try:
+            return ScamVerdict.model_validate_json(text[start:])
+        except ValidationError as e:
+            salvaged = self._salvage_verdict(text[start:])
+            if salvaged is not None:
+                self.stats["verdicts_salvaged"] += 1
+                return salvaged
+            self.stats["parse_failures"] += 1
+            print(f"Invalid LLM verdict: {e.errors()[0].get('msg', '')}")
+            return None
+    
+    def _salvage_verdict(self, text: str) -> Optional[ScamVerdict]:
+        """Keep is_scam and confidence from a verdict that was cut off after them"""
+        is_scam = VERDICT_IS_SCAM.search(text)
+        confidence = VERDICT_CONFIDENCE.search(text)
+        if is_scam is None or confidence is None:
+            return None
+        try:
+            return ScamVerdict(is_scam=is_scam.group(1) == "true", confidence=float(confidence.group(1)))
+        except ValidationError:
+            return None
@@ -0,0 +1,413 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from conversation import Role, ROLE_NAMES
+from config import (
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_SHARDS,
+    TRANSCRIPT_SEGMENT_BYTES,
+    TRANSCRIPT_FSYNC_BATCH,
+    TRANSCRIPT_FSYNC_INTERVAL_SECONDS,
+    TRANSCRIPT_RETENTION_DAYS,
+    TRANSCRIPT_COMPACTION_INTERVAL_SECONDS,
+    TRANSCRIPT_COMPACTION_GARBAGE_RATIO
+)
+
+
+class TranscriptShard:
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.lock = threading.Lock()
+        self.segments: List[int] = []
+        self.active_id = 0
+        self.active_file = None
+        self.active_size = 0
+        self.total_bytes = 0
+        self.dead_bytes = 0
+        self.unsynced = 0
+        # Guarded by `lock`, like the rest of the shard
+        self.index: Dict[str, array] = {}
+        self.last_seen: Dict[str, float] = {}
+
+
+class TranscriptStore:
+    """
+    Durable, append-only log of every conversation turn.
+
+    Conversations are sharded by a stable hash of their id. Each shard writes
+    newline-delimited JSON records to numbered segment files, rolling to a new
+    segment once the active one reaches TRANSCRIPT_SEGMENT_BYTES. An in-memory
+    index maps each conversation to the (segment, offset, length) of its
+    records, so reading one transcript never scans the log; the index is
+    rebuilt from the segments on startup.
+
+    Writes are fsynced in batches. Deleting a conversation appends a
+    tombstone, and compaction later rewrites a shard without deleted or
+    expired conversations.
+    """
+
+    def __init__(
+        self,
+        directory: str = TRANSCRIPT_DIR,
+        shards: int = TRANSCRIPT_SHARDS,
+        segment_bytes: int = TRANSCRIPT_SEGMENT_BYTES,
+        fsync_batch: int = TRANSCRIPT_FSYNC_BATCH,
+        retention_days: Optional[float] = TRANSCRIPT_RETENTION_DAYS
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_batch = fsync_batch
+        self.retention_days = retention_days
+        self._shards = [TranscriptShard(i) for i in range(shards)]
+        self.stats = {
+            "records_appended": 0,
+            "fsyncs": 0,
+            "compactions": 0,
+            "conversations_expired": 0
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".log.tmp"):
+                os.remove(os.path.join(directory, name))  # Unfinished compaction output
+        for shard in self._shards:
+            self._load_shard(shard)
+
+    def _shard_for(self, conversation_id: str) -> TranscriptShard:
+        return self._shards[zlib.crc32(conversation_id.encode("utf-8")) % len(self._shards)]
+
+    def _segment_path(self, shard_id: int, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{shard_id:03d}-{segment_id:08d}.log")
+
+    def _load_shard(self, shard: TranscriptShard):
+        prefix = f"{shard.shard_id:03d}-"
+        shard.segments = sorted(
+            int(name[len(prefix):-4])
+            for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(".log")
+        )
+
+        # A compaction that crashed before removing its inputs leaves them
+        # behind; the compacted segment's header says which ones to drop.
+        replaced = set()
+        for segment_id in shard.segments:
+            with open(self._segment_path(shard.shard_id, segment_id), "rb") as f:
+                first = f.readline()
+            if first.endswith(b"\n") and b'"op": "compacted"' in first:
+                replaced.update(json.loads(first)["replaces"])
+        for segment_id in replaced & set(shard.segments):
+            os.remove(self._segment_path(shard.shard_id, segment_id))
+        shard.segments = [s for s in shard.segments if s not in replaced]
+
+        for segment_id in shard.segments:
+            path = self._segment_path(shard.shard_id, segment_id)
+            offset = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write from a crash; truncated below
+                    self._replay(shard, segment_id, offset, line)
+                    offset += len(line)
+            if offset != os.path.getsize(path):
+                os.truncate(path, offset)
+            shard.total_bytes += offset
+
+        if not shard.segments:
+            shard.segments.append(0)
+        self._open_active(shard, shard.segments[-1])
+
+    def _replay(self, shard: TranscriptShard, segment_id: int, offset: int, line: bytes):
+        record = json.loads(line)
+        conversation_id = record["c"]
+
+        if record.get("op") == "compacted":
+            return
+        if record.get("op") == "delete":
+            shard.dead_bytes += len(line) + self._drop(shard, conversation_id)
+            return
+
+        shard.index.setdefault(conversation_id, array("q")).extend((segment_id, offset, len(line)))
+        shard.last_seen[conversation_id] = record["t"]
+
+    def _drop(self, shard: TranscriptShard, conversation_id: str) -> int:
+        """Remove a conversation from the shard's index; returns the bytes it occupied"""
+        entries = shard.index.pop(conversation_id, None)
+        shard.last_seen.pop(conversation_id, None)
+        return sum(entries[2::3]) if entries else 0
+
+    def _open_active(self, shard: TranscriptShard, segment_id: int):
+        if shard.active_file is not None:
+            self._sync(shard)
+            shard.active_file.close()
+        if segment_id not in shard.segments:
+            shard.segments.append(segment_id)
+        shard.active_id = segment_id
+        shard.active_file = open(self._segment_path(shard.shard_id, segment_id), "ab")
+        shard.active_size = shard.active_file.tell()
+
+    def _write(self, shard: TranscriptShard, line: bytes) -> Tuple[int, int]:
+        if shard.active_size and shard.active_size + len(line) > self.segment_bytes:
+            self._open_active(shard, shard.active_id + 1)
+        offset = shard.active_size
+        shard.active_file.write(line)
+        shard.active_size += len(line)
+        shard.total_bytes += len(line)
+        shard.unsynced += 1
+        return shard.active_id, offset
+
+    def _sync(self, shard: TranscriptShard):
+        if shard.unsynced and shard.active_file is not None:
+            shard.active_file.flush()
+            os.fsync(shard.active_file.fileno())
+            shard.unsynced = 0
+            self.stats["fsyncs"] += 1
+
+    def append(self, conversation_id: str, turns: List[Tuple[Role, str, float]]):
+        """Append new turns as (role, content, epoch timestamp)"""
+        shard = self._shard_for(conversation_id)
+        with shard.lock:
+            entries = shard.index.setdefault(conversation_id, array("q"))
+            for role, content, timestamp in turns:
+                line = json.dumps(
+                    {"c": conversation_id, "r": int(role), "t": timestamp, "m": content},
+                    ensure_ascii=False
+                ).encode("utf-8") + b"\n"
+                segment_id, offset = self._write(shard, line)
+                entries.extend((segment_id, offset, len(line)))
+                shard.last_seen[conversation_id] = timestamp
+            self.stats["records_appended"] += len(turns)
+
+            if shard.unsynced >= self.fsync_batch:
+                self._sync(shard)
+
+    def delete(self, conversation_id: str) -> bool:
+        shard = self._shard_for(conversation_id)
+        with shard.lock:
+            if conversation_id not in shard.index:
+                return False
+            line = json.dumps({"c": conversation_id, "op": "delete", "t": time.time()}).encode("utf-8") + b"\n"
+            self._write(shard, line)
+            shard.dead_bytes += len(line) + self._drop(shard, conversation_id)
+            self._sync(shard)
+        return True
+
+    def __contains__(self, conversation_id: str) -> bool:
+        shard = self._shard_for(conversation_id)
+        with shard.lock:
+            return conversation_id in shard.index
+
+    def read(self, conversation_id: str) -> List[Dict]:
+        """Return the stored turns in the {"role", "content", "timestamp"} shape"""
+        try:
+            return self._read(conversation_id)
+        except FileNotFoundError:
+            # Compaction swapped the segments under us; the index is current now
+            return self._read(conversation_id)
+
+    def _read(self, conversation_id: str) -> List[Dict]:
+        shard = self._shard_for(conversation_id)
+        with shard.lock:
+            entries = shard.index.get(conversation_id)
+            if not entries:
+                return []
+            entries = array("q", entries)
+            shard.active_file.flush()
+
+        messages = []
+        handles = {}
+        try:
+            for i in range(0, len(entries), 3):
+                segment_id, offset, length = entries[i], entries[i + 1], entries[i + 2]
+                if segment_id not in handles:
+                    handles[segment_id] = open(self._segment_path(shard.shard_id, segment_id), "rb")
+                f = handles[segment_id]
+                f.seek(offset)
+                record = json.loads(f.read(length))
+                messages.append({
+                    "role": ROLE_NAMES[Role(record["r"])],
+                    "content": record["m"],
+                    "timestamp": datetime.fromtimestamp(record["t"]).isoformat()
+                })
+        finally:
+            for f in handles.values():
+                f.close()
+        return messages
+
+    def sync_all(self):
+        for shard in self._shards:
+            with shard.lock:
+                self._sync(shard)
+
+    def compact(self, force: bool = False) -> int:
+        """Rewrite shards with enough garbage or expired conversations; returns shards compacted"""
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        compacted = 0
+        for shard in self._shards:
+            with shard.lock:
+                expired = {
+                    cid for cid, seen in shard.last_seen.items()
+                    if cutoff is not None and seen < cutoff
+                }
+                garbage = shard.dead_bytes / shard.total_bytes if shard.total_bytes else 0.0
+                if not force and not expired and garbage < TRANSCRIPT_COMPACTION_GARBAGE_RATIO:
+                    continue
+            self._compact_shard(shard, expired)
+            compacted += 1
+        return compacted
+
+    def _compact_shard(self, shard: TranscriptShard, expired: set):
+        # 1. Seal the current segments: new writes go to a fresh active segment
+        with shard.lock:
+            old_segments = list(shard.segments)
+            compacted_id = shard.active_id + 1
+            self._open_active(shard, shard.active_id + 2)
+            shard.segments = [compacted_id, shard.active_id]
+            sealed = {
+                cid: array("q", entries)
+                for cid, entries in shard.index.items()
+                if cid not in expired
+            }
+
+        # 2. Copy live records into the compacted segment without holding the lock
+        relocated: Dict[str, array] = {}
+        handles = {}
+        final_path = self._segment_path(shard.shard_id, compacted_id)
+        with open(final_path + ".tmp", "wb") as out:
+            header = json.dumps({"c": "", "op": "compacted", "replaces": old_segments}).encode("utf-8") + b"\n"
+            out.write(header)
+            written = len(header)
+            for cid, entries in sealed.items():
+                moved = array("q")
+                for i in range(0, len(entries), 3):
+                    segment_id, offset, length = entries[i], entries[i + 1], entries[i + 2]
+                    if segment_id not in old_segments:
+                        break
+                    if segment_id not in handles:
+                        handles[segment_id] = open(self._segment_path(shard.shard_id, segment_id), "rb")
+                    handles[segment_id].seek(offset)
+                    out.write(handles[segment_id].read(length))
+                    moved.extend((compacted_id, written, length))
+                    written += length
+                relocated[cid] = moved
+            out.flush()
+            os.fsync(out.fileno())
+        for f in handles.values():
+            f.close()
+        os.replace(final_path + ".tmp", final_path)
+
+        # 3. Point the index at the new copies and drop the sealed segments
+        with shard.lock:
+            for cid in expired:
+                entries = shard.index.get(cid)
+                if entries is None:
+                    continue
+                tail = self._entries_after(entries, old_segments)
+                if tail:
+                    shard.index[cid] = tail  # Active again; only the expired turns go
+                else:
+                    self._drop(shard, cid)
+                    self.stats["conversations_expired"] += 1
+            for cid, moved in relocated.items():
+                entries = shard.index.get(cid)
+                if entries is None:
+                    continue  # Deleted while we were copying
+                shard.index[cid] = moved + self._entries_after(entries, old_segments)
+            shard.total_bytes = written + shard.active_size
+            shard.dead_bytes = 0
+            for segment_id in old_segments:
+                os.remove(self._segment_path(shard.shard_id, segment_id))
+            self.stats["compactions"] += 1
+
+    def _entries_after(self, entries: array, segments: List[int]) -> array:
+        """Entries that live outside `segments` (always a suffix of the list)"""
+        for i in range(0, len(entries), 3):
+            if entries[i] not in segments:
+                return array("q", entries[i:])
+        return array("q")
+
+    async def run_maintenance(
+        self,
+        fsync_interval: float = TRANSCRIPT_FSYNC_INTERVAL_SECONDS,
+        compaction_interval: float = TRANSCRIPT_COMPACTION_INTERVAL_SECONDS
+    ):
+        """Background loop: periodic fsync of pending writes and compaction"""
+        last_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(fsync_interval)
+            try:
+                await asyncio.to_thread(self.sync_all)
+                if time.monotonic() - last_compaction >= compaction_interval:
+                    last_compaction = time.monotonic()
+                    await asyncio.to_thread(self.compact)
+            except Exception as e:
+                # Keep the loop alive; the next round retries
+                print(f"Transcript maintenance error: {e}")
+
+    def close(self):
+        for shard in self._shards:
+            with shard.lock:
+                if shard.active_file is not None:
+                    self._sync(shard)
+                    shard.active_file.close()
+                    shard.active_file = None
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "conversations": sum(len(s.index) for s in self._shards),
+            "bytes_on_disk": sum(s.total_bytes for s in self._shards),
+            "dead_bytes": sum(s.dead_bytes for s in self._shards)
+        }
+
+
+def list_shards(directory: str = TRANSCRIPT_DIR) -> List[int]:
+    """Shard ids that have segment files in `directory`"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted({
+        int(name[:3]) for name in os.listdir(directory)
+        if name.endswith(".log") and name[:3].isdigit()
+    })
+
+
+def scan_shard(directory: str, shard_id: int) -> Iterator[Dict]:
+    """
+    Read-only pass over one shard's records in log order, for offline jobs.
+
+    Yields {"c", "r", "t", "m"} turn records and {"c", "op": "delete"}
+    tombstones. Nothing on disk is touched, so this is safe next to a running
+    server: segments already replaced by a compacted copy are skipped and a
+    torn last line is ignored. Raises FileNotFoundError if a compaction
+    removes a segment mid-scan; the caller should rescan the shard.
+    """
+    prefix = f"{shard_id:03d}-"
+    segments = sorted(
+        int(name[len(prefix):-4])
+        for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(".log")
+    )
+
+    replaced = set()
+    for segment_id in segments:
+        with open(os.path.join(directory, f"{prefix}{segment_id:08d}.log"), "rb") as f:
+            first = f.readline()
+        if first.endswith(b"\n") and b'"op": "compacted"' in first:
+            replaced.update(json.loads(first)["replaces"])
+
+    for segment_id in segments:
+        if segment_id in replaced:
+            continue
+        with open(os.path.join(directory, f"{prefix}{segment_id:08d}.log"), "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if record.get("op") != "compacted":
+                    yield record